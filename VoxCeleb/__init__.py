@@ -27,28 +27,202 @@
 # Hervé BREDIN - http://herve.niderb.fr
 
 
-from ._version import get_versions
+# This module is imported (through the "pyannote.database.databases" entry
+# point) by any tool that lists protocols. Only import what is needed to
+# define protocols here: pyannote.core, numpy, and tables are only imported
+# once files or trials are actually requested.
 
-__version__ = get_versions()["version"]
-del get_versions
-
-from itertools import chain
-import pandas as pd
-from pathlib import Path
-from pyannote.core import Segment, Timeline, Annotation
+import operator
+from collections.abc import MutableMapping, Sequence
 from pyannote.database import Database
 from pyannote.database.protocol import SpeakerVerificationProtocol
 
+from .timing import timer
+
+
+def __getattr__(name):
+    # resolving version spawns `git` subprocesses in development checkouts
+    if name == "__version__":
+        from ._version import get_versions
+
+        globals()["__version__"] = get_versions()["version"]
+        return globals()["__version__"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _annotation(current_file):
+    """Build "who speaks when" annotation of VoxCeleb file"""
+    speaker = current_file.get("speaker", None)
+    if speaker is None:
+        return None
+    from pyannote.core import Annotation, Segment
+
+    annotation = Annotation(uri=current_file["uri"])
+    annotation[Segment(0, current_file["duration"])] = speaker
+    return annotation
+
+
+def _annotated(current_file):
+    """Build annotated timeline of VoxCeleb file"""
+    duration = current_file.get("duration", None)
+    if duration is None:
+        return None
+    from pyannote.core import Segment, Timeline
+
+    return Timeline(segments=[Segment(0, duration)], uri=current_file["uri"])
+
+
+def _shard(rank, world_size):
+    """Get keyword arguments of `{subset}_iter` methods for requested shard
+
+    None are passed when iterating over all files (or trials), so that
+    subclasses can still override `{subset}_iter(self)` methods.
+    """
+    from .tables import check_shard
+
+    check_shard(rank, world_size)
+    if world_size == 1:
+        return dict()
+    return {"rank": rank, "world_size": world_size}
+
+
+class _Overlay(MutableMapping):
+    """Mapping where a few keys are overridden by precomputed values"""
+
+    def __init__(self, current_file, values):
+        self.current_file = current_file
+        self.values = values
+
+    def __getitem__(self, key):
+        if key in self.values:
+            return self.values[key]
+        return self.current_file[key]
+
+    def __setitem__(self, key, value):
+        self.current_file[key] = value
+
+    def __delitem__(self, key):
+        del self.current_file[key]
+
+    def __iter__(self):
+        yield from self.values
+        for key in self.current_file:
+            if key not in self.values:
+                yield key
+
+    def __len__(self):
+        return len(set(self.values) | set(self.current_file))
+
+
+class _Chain:
+    """Apply user preprocessor on top of the default one
+
+    Similar to pyannote.database `crop_annotation(existing_preprocessor=...)`:
+    while `preprocessor` runs, `current_file[key]` resolves to the value
+    built by `default`, so that it can transform it (e.g. rename labels).
+    """
+
+    def __init__(self, key, default, preprocessor):
+        self.key = key
+        self.default = default
+        self.preprocessor = preprocessor
+
+    def __call__(self, current_file):
+        value = self.default(current_file)
+        return self.preprocessor(_Overlay(current_file, {self.key: value}))
+
+
+class FileView(Sequence):
+    """Random-access view over files of a subset
+
+    Parameters
+    ----------
+    protocol : Base
+        Protocol used to build and preprocess files.
+    table : FileTable
+        Table of files.
+
+    Usage
+    -----
+    >>> files = protocol.train_view()
+    >>> len(files)
+    >>> files[123]["uri"]
+    """
+
+    def __init__(self, protocol, table):
+        self.protocol = protocol
+        self.table = table
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, i):
+
+        if isinstance(i, slice):
+            indices = range(len(self.table))[i]
+            return FileView(self.protocol, self.table.take(indices))
+
+        i = operator.index(i)
+        if i < 0:
+            i += len(self.table)
+        if not 0 <= i < len(self.table):
+            raise IndexError("file index out of range")
+
+        return self.protocol.preprocess(self.protocol.table_file(self.table, i))
+
 
 class Base(SpeakerVerificationProtocol):
-    def xxx_iter(self, voxceleb, subset):
-        """Iterate on VoxCeleb files
+    def __init__(self, preprocessors=None):
 
-        Each file is yielded as a dictionary with the following keys:
+        if preprocessors is None:
+            preprocessors = dict()
 
-        ['uri'] (`str`)
-            Unique file identifier.
+        # "annotation" and "annotated" are only built when they are accessed,
+        # and user preprocessors for these keys are applied on top of them
+        defaults = {"annotation": _annotation, "annotated": _annotated}
+        for key, default in defaults.items():
+            preprocessor = preprocessors.get(key, None)
+            if callable(preprocessor):
+                defaults[key] = _Chain(key, default, preprocessor)
+            elif preprocessor is not None:
+                defaults[key] = preprocessor
+        preprocessors = {**preprocessors, **defaults}
+
+        super().__init__(preprocessors=preprocessors)
 
+    def subset_helper(self, subset, rank=0, world_size=1):
+        files = getattr(self, f"{subset}_iter")(**_shard(rank, world_size))
+        label = f"{self.__class__.__name__}.{subset}"
+        for file in timer.iterate("files.iterate", files, label=label):
+            yield self.preprocess(file)
+
+    def train(self, rank=0, world_size=1):
+        """Iterate over files in the training subset
+
+        Parameters
+        ----------
+        rank, world_size : int, optional
+            Only iterate over the `rank`-th out of `world_size` shards of
+            similar total duration. Defaults to iterating over all files.
+        """
+        return self.subset_helper("train", rank=rank, world_size=world_size)
+
+    def development(self, rank=0, world_size=1):
+        """Iterate over files in the development subset
+
+        See `train` for the description of parameters.
+        """
+        return self.subset_helper("development", rank=rank, world_size=world_size)
+
+    def test(self, rank=0, world_size=1):
+        """Iterate over files in the test subset
+
+        See `train` for the description of parameters.
+        """
+        return self.subset_helper("test", rank=rank, world_size=world_size)
+
+    def xxx_table(self, voxceleb, subset):
+        """Get VoxCeleb files as a columnar table
 
         Parameters
         ----------
@@ -56,74 +230,366 @@ class Base(SpeakerVerificationProtocol):
             VoxCeleb1 or VoxCeleb2
         subset : {'dev', 'tst'}
             Developement or test subset.
+
+        Returns
+        -------
+        table : FileTable
+            Table with "uri", "speaker", "video", "utterance", and "duration"
+            columns. It is shared with (and cached by) other protocols and
+            should therefore not be modified in place.
         """
+        from .tables import load_durations
 
-        # load durations
-        path = Path(__file__).parent / "data"
-        path = path / f"vox{voxceleb:d}_{subset}_duration.txt.gz"
-        content = pd.read_table(
-            path, names=["uri", "duration"], index_col="uri", delim_whitespace=True
-        )
+        return load_durations(f"vox{voxceleb:d}_{subset}")
+
+    def table_iter(self, table):
+        """Iterate on files of a columnar table
 
-        for uri, duration in content.itertuples():
+        Each file is yielded as a dictionary with the following keys:
 
-            speaker = uri.split("/")[0]
-            segment = Segment(0, duration)
+        ['uri'] (`str`)
+            Unique file identifier.
+        ['duration'] (`float`)
+            File duration, in seconds.
+        ['speaker'] (`str`)
+            Speaker identifier.
 
-            annotation = Annotation(uri=uri)
-            annotation[segment] = speaker
+        "annotation" and "annotated" keys are added by the protocol
+        preprocessors and only built when they are actually accessed.
 
-            annotated = Timeline(segments=[segment], uri=uri)
+        Parameters
+        ----------
+        table : FileTable
+            Table of files.
+        """
+
+        for uri, duration, speaker in table.iter_rows():
 
             current_file = {
                 "uri": uri,
                 "database": "VoxCeleb",
-                "annotation": annotation,
-                "annotated": annotated,
+                "duration": duration,
+                "speaker": speaker,
             }
 
             yield current_file
 
-    def train_iter(self):
+    def table_file(self, table, i):
+        """Get i-th file of a columnar table
+
+        See `table_iter` for the description of returned file.
+
+        Parameters
+        ----------
+        table : FileTable
+            Table of files.
+        i : int
+            File index.
+        """
+        return {
+            "uri": table.get_uri(i),
+            "database": "VoxCeleb",
+            "duration": float(table.duration[i]),
+            "speaker": table.get_speaker(i),
+        }
+
+    def xxx_iter(self, voxceleb, subset):
+        """Iterate on VoxCeleb files
+
+        See `table_iter` for the description of yielded files.
+
+        Parameters
+        ----------
+        voxceleb : {1, 2}
+            VoxCeleb1 or VoxCeleb2
+        subset : {'dev', 'tst'}
+            Developement or test subset.
+        """
+        return self.table_iter(self.xxx_table(voxceleb, subset))
+
+    def train_table(self):
         raise NotImplementedError("This protocol does not define a training set.")
 
-    def development_iter(self):
+    def development_table(self):
         raise NotImplementedError("This protocol does not define a development set.")
 
-    def test_iter(self):
+    def test_table(self):
         raise NotImplementedError("This protocol does not define a test set.")
 
-    def xxx_try_iter(self, protocol):
+    def train_iter(self, rank=0, world_size=1):
+        table = self.train_table().shard(rank, world_size)
+        return self.table_iter(table)
+
+    def development_iter(self, rank=0, world_size=1):
+        table = self.development_table().shard(rank, world_size)
+        return self.table_iter(table)
+
+    def test_iter(self, rank=0, world_size=1):
+        table = self.test_table().shard(rank, world_size)
+        return self.table_iter(table)
 
-        # load all VoxCeleb1 durations (dev AND tst)
-        path = Path(__file__).parent / "data" / "vox1_dev_duration.txt.gz"
-        dev = pd.read_table(
-            path, names=["uri", "duration"], index_col="uri", delim_whitespace=True
+    def train_view(self, rank=0, world_size=1):
+        """Random-access view over files of the training subset
+
+        See `train` for the description of parameters.
+        """
+        return FileView(self, self.train_table().shard(rank, world_size))
+
+    def development_view(self, rank=0, world_size=1):
+        """Random-access view over files of the development subset
+
+        See `train` for the description of parameters.
+        """
+        return FileView(self, self.development_table().shard(rank, world_size))
+
+    def test_view(self, rank=0, world_size=1):
+        """Random-access view over files of the test subset
+
+        See `train` for the description of parameters.
+        """
+        return FileView(self, self.test_table().shard(rank, world_size))
+
+    def table_records(self, table):
+        """Iterate on files of a columnar table, as lightweight records
+
+        Records have the same keys as files yielded by `table_iter` (and are
+        preprocessed the same way), but only hold a reference to `table`.
+        See `VoxCeleb.records` for details.
+
+        Parameters
+        ----------
+        table : FileTable
+            Table of files.
+        """
+        from .records import FileRecord
+
+        preprocessors = self.preprocessors
+        return (FileRecord(table, i, preprocessors) for i in range(len(table)))
+
+    def subset_record_helper(self, subset, rank=0, world_size=1):
+        table = getattr(self, f"{subset}_table")().shard(rank, world_size)
+        label = f"{self.__class__.__name__}.{subset}"
+        return timer.iterate("files.iterate", self.table_records(table), label=label)
+
+    def train_records(self, rank=0, world_size=1):
+        """Iterate over files in the training subset, as lightweight records
+
+        Same as `train` but files are `VoxCeleb.records.FileRecord` instances
+        (instead of `ProtocolFile`), which use much less memory.
+        """
+        return self.subset_record_helper("train", rank=rank, world_size=world_size)
+
+    def development_records(self, rank=0, world_size=1):
+        """Iterate over files in the development subset, as lightweight records
+
+        See `train_records` for details.
+        """
+        return self.subset_record_helper(
+            "development", rank=rank, world_size=world_size
         )
 
-        path = Path(__file__).parent / "data" / "vox1_tst_duration.txt.gz"
-        tst = pd.read_table(
-            path, names=["uri", "duration"], index_col="uri", delim_whitespace=True
+    def test_records(self, rank=0, world_size=1):
+        """Iterate over files in the test subset, as lightweight records
+
+        See `train_records` for details.
+        """
+        return self.subset_record_helper("test", rank=rank, world_size=world_size)
+
+    def train_speaker_index(self):
+        """Index files of the training subset by speaker
+
+        Returns
+        -------
+        index : SpeakerIndex
+            Sorted speakers, and (offset, count) range of the files of each
+            speaker in training files sorted by speaker. Indices of files
+            are indices in `train_table()` and `train_view()`.
+        """
+        return self.train_table().speaker_index()
+
+    def development_speaker_index(self):
+        """Index files of the development subset by speaker
+
+        See `train_speaker_index` for details.
+        """
+        return self.development_table().speaker_index()
+
+    def test_speaker_index(self):
+        """Index files of the test subset by speaker
+
+        See `train_speaker_index` for details.
+        """
+        return self.test_table().speaker_index()
+
+    def train_speaker_batches(
+        self, num_speakers, num_files, seed=0, rank=0, world_size=1, start=0
+    ):
+        """Infinite sampler of speaker-balanced training batches
+
+        Parameters
+        ----------
+        num_speakers : int
+            Number of speakers per batch (P).
+        num_files : int
+            Number of files per speaker (K).
+        seed : int, optional
+            Random seed. Defaults to 0.
+        rank, world_size : int, optional
+            Only draw the `rank`-th out of every `world_size` batches.
+            Defaults to drawing all batches.
+        start : int, optional
+            Index of the first batch (e.g. to resume training).
+
+        Returns
+        -------
+        sampler : SpeakerBatchSampler
+            Yields (P * K, ) arrays of indices of files in `train_view()`,
+            grouped by speaker.
+        """
+        from .samplers import SpeakerBatchSampler
+
+        return SpeakerBatchSampler(
+            self.train_speaker_index(),
+            num_speakers,
+            num_files,
+            seed=seed,
+            rank=rank,
+            world_size=world_size,
+            start=start,
+        )
+
+    def train_chunk_batches(
+        self,
+        duration,
+        batch_size,
+        policy="exclude",
+        seed=0,
+        rank=0,
+        world_size=1,
+        start=0,
+    ):
+        """Infinite sampler of fixed-duration training chunks
+
+        Files are drawn with a probability proportional to their duration.
+
+        Parameters
+        ----------
+        duration : float
+            Chunk duration, in seconds.
+        batch_size : int
+            Number of chunks per batch.
+        policy : {"exclude", "pad"}, optional
+            Whether to exclude files shorter than `duration` (default) or
+            to draw chunks starting at 0 in them (to be padded by the caller).
+        seed, rank, world_size, start : int, optional
+            See `train_speaker_batches`.
+
+        Returns
+        -------
+        sampler : ChunkSampler
+            Yields (indices, offsets) tuples of (batch_size, ) arrays, where
+            `indices` are indices of files in `train_view()` and `offsets`
+            are chunks start times.
+        """
+        from .samplers import ChunkSampler
+
+        return ChunkSampler(
+            self.train_table().duration,
+            duration,
+            batch_size,
+            policy=policy,
+            seed=seed,
+            rank=rank,
+            world_size=world_size,
+            start=start,
         )
 
-        durations = dev.append(tst)
+    def filter_table(self, table, gender=None, subset=None):
+        """Select files of a table based on VoxCeleb 2 speaker metadata
+
+        Parameters
+        ----------
+        table : FileTable
+            Files (e.g. `protocol.train_table()`).
+        gender : {"m", "f"}, optional
+            Only select files of speakers with this gender.
+        subset : {"dev", "test"}, optional
+            Only select files of speakers from this official subset.
+
+        Returns
+        -------
+        selected : FileTable
+            Selected files. Files of speakers missing from metadata (i.e.
+            VoxCeleb 1 speakers) are never selected.
+        """
+        from .tables import load_metadata
+
+        return load_metadata().select_files(table, gender=gender, subset=subset)
 
-        # load tests
-        path = Path(__file__).parent / "data" / f"verif_{protocol}.txt.gz"
-        trials = pd.read_table(
-            path, delim_whitespace=True, names=["reference", "file1", "file2"]
+    def filter_trials(self, trials, gender=None, same_gender=False):
+        """Select trials based on VoxCeleb 2 speaker metadata
+
+        Parameters
+        ----------
+        trials : TrialTable
+            Trials (e.g. `protocol.test_trial_table()`).
+        gender : {"m", "f"}, optional
+            Only select trials where both speakers have this gender.
+        same_gender : bool, optional
+            Only select trials where both speakers have the same gender.
+
+        Returns
+        -------
+        selected : TrialTable
+            Selected trials. Bundled trial lists are made of VoxCeleb 1
+            speakers, whose gender is unknown: filtering them by gender
+            therefore selects no trial.
+        """
+        from .tables import load_metadata
+
+        return load_metadata().select_trials(
+            trials, gender=gender, same_gender=same_gender
         )
-        trials.sort_values("file1", inplace=True)
 
-        for _, reference, file1, file2 in trials.itertuples():
+    def xxx_try_table(self, protocol):
+        """Get VoxCeleb trials as an integer-encoded trial table
+
+        Parameters
+        ----------
+        protocol : {'original', 'x'}
+            Trial list.
+
+        Returns
+        -------
+        trials : TrialTable
+            Trials sorted by enrolment file. They are shared with (and cached
+            by) other protocols and should therefore not be modified in place.
+        """
+        from .tables import load_trials
 
-            uri1 = file1[:-4]
-            duration1 = durations.loc[uri1].item()
-            segment1 = Segment(0, duration1)
+        return load_trials(protocol)
 
-            uri2 = file2[:-4]
-            duration2 = durations.loc[uri2].item()
-            segment2 = Segment(0, duration2)
+    def trial_iter(self, trials):
+        """Iterate on trials of an integer-encoded trial table
+
+        Parameters
+        ----------
+        trials : TrialTable
+            Trials.
+        """
+
+        from pyannote.core import Segment, Timeline
+
+        uris = trials.files.uris
+        durations = trials.files.duration.tolist()
+
+        for reference, (i1, i2) in zip(
+            trials.reference.tolist(), trials.pairs.tolist()
+        ):
+
+            uri1, uri2 = uris[i1], uris[i2]
+            segment1 = Segment(0, durations[i1])
+            segment2 = Segment(0, durations[i2])
 
             current_trial = {
                 "reference": reference,
@@ -141,46 +607,245 @@ class Base(SpeakerVerificationProtocol):
 
             yield current_trial
 
-    def train_trial_iter(self):
+    def trial_group_iter(self, trials):
+        """Iterate on trials of an integer-encoded trial table, grouped by
+        enrolment file
+
+        Each group is yielded as a (file1, files2, references) tuple where
+        `file1` is the enrolment file, `files2` the list of test files it is
+        compared to, and `references` the list of corresponding references.
+        Files are dictionaries with the same keys as in `trial_iter`.
+
+        Parameters
+        ----------
+        trials : TrialTable
+            Trials, sorted by enrolment file.
+        """
+
+        from pyannote.core import Segment, Timeline
+
+        uris = trials.files.uris
+        durations = trials.files.duration.tolist()
+
+        def get_file(i):
+            uri = uris[i]
+            segment = Segment(0, durations[i])
+            return {
+                "database": "VoxCeleb",
+                "uri": uri,
+                "try_with": Timeline(segments=[segment], uri=uri),
+            }
+
+        for i1, indices2, references in trials.groups():
+            files2 = [get_file(i2) for i2 in indices2.tolist()]
+            yield get_file(i1), files2, references.tolist()
+
+    def trial_records(self, trials):
+        """Iterate on trials of an integer-encoded trial table, as records
+
+        Records have the same keys as trials yielded by `trial_iter` (and
+        their files are preprocessed the same way), but only hold a
+        reference to `trials.files`. See `VoxCeleb.records` for details.
+
+        Parameters
+        ----------
+        trials : TrialTable
+            Trials.
+        """
+
+        from .records import TrialFileRecord, TrialRecord
+
+        files = trials.files
+        preprocessors = self.preprocessors
+
+        for reference, (i1, i2) in zip(
+            trials.reference.tolist(), trials.pairs.tolist()
+        ):
+            yield TrialRecord(
+                reference,
+                TrialFileRecord(files, i1, preprocessors),
+                TrialFileRecord(files, i2, preprocessors),
+            )
+
+    def subset_trial_helper(self, subset, rank=0, world_size=1):
+        try:
+            trials = getattr(self, f"{subset}_trial_iter")(**_shard(rank, world_size))
+        except NotImplementedError:
+            # same exception as pyannote.database for missing trials
+            raise AttributeError(f"{subset}_trial_iter is not implemented.")
+        label = f"{self.__class__.__name__}.{subset}"
+        for trial in timer.iterate("trials.iterate", trials, label=label):
+            trial["file1"] = self.preprocess(trial["file1"])
+            trial["file2"] = self.preprocess(trial["file2"])
+            yield trial
+
+    def train_trial(self, rank=0, world_size=1):
+        """Iterate over trials in the training subset
+
+        Parameters
+        ----------
+        rank, world_size : int, optional
+            Only iterate over the `rank`-th out of `world_size` shards of
+            similar total duration. Trials sharing the same enrolment file
+            always end up in the same shard. Defaults to iterating over all
+            trials.
+        """
+        return self.subset_trial_helper("train", rank=rank, world_size=world_size)
+
+    def development_trial(self, rank=0, world_size=1):
+        """Iterate over trials in the development subset
+
+        See `train_trial` for the description of parameters.
+        """
+        return self.subset_trial_helper("development", rank=rank, world_size=world_size)
+
+    def test_trial(self, rank=0, world_size=1):
+        """Iterate over trials in the test subset
+
+        See `train_trial` for the description of parameters.
+        """
+        return self.subset_trial_helper("test", rank=rank, world_size=world_size)
+
+    def subset_trial_record_helper(self, subset, rank=0, world_size=1):
+        trials = getattr(self, f"{subset}_trial_table")().shard(rank, world_size)
+        label = f"{self.__class__.__name__}.{subset}"
+        return timer.iterate("trials.iterate", self.trial_records(trials), label=label)
+
+    def train_trial_records(self, rank=0, world_size=1):
+        """Iterate over trials in the training subset, as lightweight records
+
+        Same as `train_trial` but trials are `VoxCeleb.records.TrialRecord`
+        instances, which use much less memory.
+        """
+        return self.subset_trial_record_helper(
+            "train", rank=rank, world_size=world_size
+        )
+
+    def development_trial_records(self, rank=0, world_size=1):
+        """Iterate over trials in the development subset, as lightweight records
+
+        See `train_trial_records` for details.
+        """
+        return self.subset_trial_record_helper(
+            "development", rank=rank, world_size=world_size
+        )
+
+    def test_trial_records(self, rank=0, world_size=1):
+        """Iterate over trials in the test subset, as lightweight records
+
+        See `train_trial_records` for details.
+        """
+        return self.subset_trial_record_helper("test", rank=rank, world_size=world_size)
+
+    def subset_trial_group_helper(self, subset, rank=0, world_size=1):
+        trials = getattr(self, f"{subset}_trial_table")().shard(rank, world_size)
+        groups = self.trial_group_iter(trials)
+        label = f"{self.__class__.__name__}.{subset}"
+        for file1, files2, references in timer.iterate(
+            "trial_groups.iterate", groups, label=label
+        ):
+            file1 = self.preprocess(file1)
+            files2 = [self.preprocess(file2) for file2 in files2]
+            yield file1, files2, references
+
+    def train_trial_groups(self, rank=0, world_size=1):
+        """Iterate on training trials, grouped by enrolment file
+
+        This allows to load the enrolment embedding once and to score it
+        against all test files at once:
+
+        >>> for file1, files2, references in protocol.train_trial_groups():
+        ...     scores = embeddings(files2) @ embedding(file1)
+
+        See `trial_group_iter` for details, and `train_trial` for the
+        description of parameters.
+        """
+        return self.subset_trial_group_helper("train", rank=rank, world_size=world_size)
+
+    def development_trial_groups(self, rank=0, world_size=1):
+        """Iterate on development trials, grouped by enrolment file
+
+        See `train_trial_groups` for details.
+        """
+        return self.subset_trial_group_helper(
+            "development", rank=rank, world_size=world_size
+        )
+
+    def test_trial_groups(self, rank=0, world_size=1):
+        """Iterate on test trials, grouped by enrolment file
+
+        See `train_trial_groups` for details.
+        """
+        return self.subset_trial_group_helper("test", rank=rank, world_size=world_size)
+
+    def xxx_try_iter(self, protocol):
+        return self.trial_iter(self.xxx_try_table(protocol))
+
+    def train_trial_table(self):
         raise NotImplementedError(
             "This protocol does not define trials on the training set."
         )
 
-    def development_trial_iter(self):
+    def development_trial_table(self):
         raise NotImplementedError(
             "This protocol does not define trials on the development set."
         )
 
-    def test_trial_iter(self):
+    def test_trial_table(self):
         raise NotImplementedError(
             "This protocol does not define trials on the test set."
         )
 
+    def train_trial_iter(self, rank=0, world_size=1):
+        trials = self.train_trial_table().shard(rank, world_size)
+        return self.trial_iter(trials)
 
-class VoxCeleb1(Base):
-    def train_iter(self):
-        return self.xxx_iter(1, "dev")
+    def development_trial_iter(self, rank=0, world_size=1):
+        trials = self.development_trial_table().shard(rank, world_size)
+        return self.trial_iter(trials)
 
-    def test_iter(self):
-        return self.xxx_iter(1, "tst")
+    def test_trial_iter(self, rank=0, world_size=1):
+        trials = self.test_trial_table().shard(rank, world_size)
+        return self.trial_iter(trials)
 
-    def test_trial_iter(self):
-        return self.xxx_try_iter("original")
+    def train_trial_files(self):
+        """Unique files used in training trials, sorted by duration
 
+        See `TrialTable.manifest` for details.
+        """
+        return self.train_trial_table().manifest()
 
-class VoxCeleb1_TrueID(VoxCeleb1):
-    def train_iter(self):
+    def development_trial_files(self):
+        """Unique files used in development trials, sorted by duration
 
-        path = Path(__file__).parent / "data" / "vox1_identities.txt.gz"
-        identities = pd.read_table(
-            path, names=["klass", "speaker"], delim_whitespace=True, index_col=["klass"]
-        )
+        See `TrialTable.manifest` for details.
+        """
+        return self.development_trial_table().manifest()
 
-        mapping = {klass: speaker for klass, speaker in identities.itertuples()}
+    def test_trial_files(self):
+        """Unique files used in test trials, sorted by duration
 
-        for current_file in super().train_iter():
-            current_file["annotation"].rename_labels(mapping, copy=False)
-            yield current_file
+        See `TrialTable.manifest` for details.
+        """
+        return self.test_trial_table().manifest()
+
+
+class VoxCeleb1(Base):
+    def train_table(self):
+        return self.xxx_table(1, "dev")
+
+    def test_table(self):
+        return self.xxx_table(1, "tst")
+
+    def test_trial_table(self):
+        return self.xxx_try_table("original")
+
+
+class VoxCeleb1_TrueID(VoxCeleb1):
+    def train_table(self):
+        from .tables import load_identified_durations
+
+        return load_identified_durations("vox1_dev")
 
 
 class VoxCeleb1_X(VoxCeleb1):
@@ -188,76 +853,178 @@ class VoxCeleb1_X(VoxCeleb1):
     kept to build an actual developement set.
     """
 
-    def train_iter(self):
-        return self.xxx_iter(1, "xtrn")
+    def train_table(self):
+        return self.xxx_table(1, "xtrn")
 
-    def development_iter(self):
-        return self.xxx_iter(1, "xdev")
+    def development_table(self):
+        return self.xxx_table(1, "xdev")
 
-    def development_trial_iter(self):
-        return self.xxx_try_iter("x")
+    def development_trial_table(self):
+        return self.xxx_try_table("x")
 
 
 class Debug(VoxCeleb1_X):
-    def train_iter(self):
-        for f, file in enumerate(super().train_iter()):
-            if f % 1000 == 0:
-                yield file
-
-    def development_trial_iter(self):
-        for t, trial in enumerate(super().development_trial_iter()):
-            if t < 100:
-                yield trial
-            else:
-                break
-
-    def test_trial_iter(self):
-        for t, trial in enumerate(super().test_trial_iter()):
-            if t < 100:
-                yield trial
-            else:
-                break
+    """Tiny version of VoxCeleb1_X, meant for debugging
+
+    Files and trials are selected directly on (compiled) tables, so that
+    nothing is built for the ones that are left out.
+
+    Parameters
+    ----------
+    stride : int, optional
+        Only keep one training file every `stride` files. Defaults to 1000.
+    fraction : float, optional
+        Only keep this fraction of (evenly spaced) training files.
+        Takes precedence over `stride` when provided.
+    num_trials : int, optional
+        Only keep the first `num_trials` development and test trials.
+        Defaults to 100.
+    """
+
+    stride = 1000
+    fraction = None
+    num_trials = 100
+
+    def __init__(self, preprocessors=None, stride=None, fraction=None, num_trials=None):
+        super().__init__(preprocessors=preprocessors)
+        if stride is not None:
+            self.stride = stride
+        if fraction is not None:
+            self.fraction = fraction
+        if num_trials is not None:
+            self.num_trials = num_trials
+
+        if self.stride < 1:
+            raise ValueError(f"stride must be at least 1 (got {self.stride}).")
+        if self.fraction is not None and not 0 < self.fraction <= 1:
+            msg = f"fraction must be in (0, 1] range (got {self.fraction})."
+            raise ValueError(msg)
+        if self.num_trials < 0:
+            msg = f"num_trials must be non-negative (got {self.num_trials})."
+            raise ValueError(msg)
+
+    def train_table(self):
+        table = super().train_table()
+        if self.fraction is None:
+            indices = range(0, len(table), self.stride)
+        else:
+            num_files = int(round(self.fraction * len(table)))
+            indices = [i * len(table) // num_files for i in range(num_files)]
+        return table.take(indices)
+
+    def development_trial_table(self):
+        trials = super().development_trial_table()
+        return trials.take(range(min(self.num_trials, len(trials))))
+
+    def test_trial_table(self):
+        trials = super().test_trial_table()
+        return trials.take(range(min(self.num_trials, len(trials))))
 
 
 class VoxCeleb2(Base):
-    def train_iter(self):
-        return self.xxx_iter(2, "dev")
+    def train_table(self):
+        return self.xxx_table(2, "dev")
 
-    def test_iter(self):
-        return self.xxx_iter(2, "tst")
+    def test_table(self):
+        return self.xxx_table(2, "tst")
 
-    def test_trial_iter(self):
-        return self.xxx_try_iter("original")
+    def test_trial_table(self):
+        return self.xxx_try_table("original")
 
 
 class VoxCeleb2_Exhaustive(Base):
-    def train_iter(self):
-        return self.xxx_iter(2, "dev")
+    def train_table(self):
+        return self.xxx_table(2, "dev")
 
-    def test_iter(self):
-        return self.xxx_iter(2, "tst")
+    def test_table(self):
+        return self.xxx_table(2, "tst")
 
-    def test_trial_iter(self):
-        return self.xxx_try_iter("exhaustive")
+    def test_trial_table(self):
+        return self.xxx_try_table("exhaustive")
 
 
 class VoxCeleb2_Hard(Base):
-    def train_iter(self):
-        return self.xxx_iter(2, "dev")
+    def train_table(self):
+        return self.xxx_table(2, "dev")
 
-    def test_iter(self):
-        return self.xxx_iter(2, "tst")
+    def test_table(self):
+        return self.xxx_table(2, "tst")
 
-    def test_trial_iter(self):
-        return self.xxx_try_iter("hard")
+    def test_trial_table(self):
+        return self.xxx_try_table("hard")
 
 
 class VoxCeleb_X(VoxCeleb1_X):
-    def train_iter(self):
-        for file in self.xxx_iter(1, "xtrn"):
-            yield file
-        for file in self.xxx_iter(2, "dev"):
-            yield file
+    def train_table(self):
+        from .tables import load_durations
+
+        return load_durations("vox1_xtrn", "vox2_dev")
+
+
+class Union(Base):
+    """Protocol made of user-declared unions of VoxCeleb tables
+
+    Parameters
+    ----------
+    train, development, test : list of str, optional
+        Names of the tables making each subset (e.g. ["vox1_dev", "vox2_dev"]
+        for "vox1_dev_duration.txt.gz" and "vox2_dev_duration.txt.gz"). Tables
+        of a subset are merged into one cached table, with a single speaker
+        encoding.
+    development_trials, test_trials : str, optional
+        Names of trial lists (e.g. "original" for "verif_original.txt.gz").
+    preprocessors : dict, optional
+        See `pyannote.database.Protocol`.
+
+    Usage
+    -----
+    >>> protocol = Union(train=["vox1_dev", "vox2_dev"], test_trials="original")
+    >>> table = protocol.train_table()
+    >>> table.statistics().total_duration
+    >>> sampler = protocol.train_speaker_batches(num_speakers=64, num_files=4)
+    """
+
+    def __init__(
+        self,
+        train=None,
+        development=None,
+        test=None,
+        development_trials=None,
+        test_trials=None,
+        preprocessors=None,
+    ):
+        super().__init__(preprocessors=preprocessors)
+        self.tables = {"train": train, "development": development, "test": test}
+        self.trials = {"development": development_trials, "test": test_trials}
+
+    def union_table(self, subset):
+        names = self.tables[subset]
+        if not names:
+            return getattr(super(), f"{subset}_table")()
+        from .tables import load_durations
+
+        return load_durations(*names)
+
+    def union_trial_table(self, subset):
+        protocol = self.trials[subset]
+        if protocol is None:
+            return getattr(super(), f"{subset}_trial_table")()
+        return self.xxx_try_table(protocol)
+
+    def train_table(self):
+        return self.union_table("train")
+
+    def development_table(self):
+        return self.union_table("development")
+
+    def test_table(self):
+        return self.union_table("test")
+
+    def development_trial_table(self):
+        return self.union_trial_table("development")
+
+    def test_trial_table(self):
+        return self.union_trial_table("test")
 
 
 class VoxCeleb(Database):
@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+"""Parsers for the whitespace-separated tables shipped in `data/`
+
+Files are read (and decompressed, if needed) by chunks of complete lines and
+each chunk is tokenized at once, with numpy, so that duration and trial
+tables are converted into arrays without building any per-line Python
+object.
+"""
+
+import gzip
+from pathlib import Path
+
+import numpy as np
+
+from .timing import timer
+
+CHUNK_SIZE = 1 << 20
+
+
+def iter_chunks(path, chunk_size=CHUNK_SIZE):
+    """Iterate over chunks of complete lines of a (possibly gzipped) file
+
+    Parameters
+    ----------
+    path : Path
+        Path to text file. Gzipped when its name ends with ".gz".
+    chunk_size : int, optional
+        Approximate chunk size, in bytes. Defaults to 1MB.
+
+    Yields
+    ------
+    chunk : bytes
+        Chunk made of complete lines.
+    """
+
+    path = Path(path)
+    open_ = gzip.open if path.suffix == ".gz" else open
+
+    remainder = b""
+    with open_(path, "rb") as f:
+        while True:
+            with timer.stage("decompress", label=path.name):
+                block = f.read(chunk_size)
+            if not block:
+                break
+            block = remainder + block
+            end = block.rfind(b"\n") + 1
+            remainder = block[end:]
+            if end > 0:
+                yield block[:end]
+
+    if remainder.strip():
+        yield remainder
+
+
+def _split(path, num_columns):
+    """Iterate over chunks of a table, split into columns of (bytes) tokens"""
+
+    for chunk in iter_chunks(path):
+        tokens = chunk.split()
+        if len(tokens) % num_columns != 0:
+            msg = f"Lines of {path} are expected to contain {num_columns} fields."
+            raise ValueError(msg)
+        yield [tokens[c::num_columns] for c in range(num_columns)]
+
+
+def _tokenize(chunk, num_columns, path):
+    """Locate tokens of a chunk without splitting it into Python objects
+
+    Returns
+    -------
+    data : np.ndarray
+        uint8 view of `chunk`.
+    starts, ends : (n_lines, num_columns) np.ndarray
+        Token `j` of line `i` is data[starts[i, j]:ends[i, j]].
+    """
+    data = np.frombuffer(chunk, dtype=np.uint8)
+    space = np.zeros(len(data) + 2, dtype=bool)
+    space[[0, -1]] = True
+    space[1:-1] = (data == 32) | (data == 9) | (data == 10) | (data == 13)
+    # token boundaries are transitions between spaces and non-spaces
+    starts = np.flatnonzero(space[:-2] & ~space[1:-1])
+    ends = np.flatnonzero(~space[1:-1] & space[2:]) + 1
+    if len(starts) % num_columns != 0:
+        msg = f"Lines of {path} are expected to contain {num_columns} fields."
+        raise ValueError(msg)
+    return data, starts.reshape(-1, num_columns), ends.reshape(-1, num_columns)
+
+
+def _fixed_width(data, starts, ends):
+    """Gather data[starts[i]:ends[i]] tokens into a fixed-width bytes array"""
+    lengths = ends - starts
+    width = max(1, int(np.max(lengths, initial=0)))
+    chars = np.zeros((len(starts), width), dtype=np.uint8)
+    # one byte position at a time, so that temporaries stay (n_tokens, )
+    last = len(data) - 1
+    for k in range(width):
+        chars[:, k] = np.where(lengths > k, data[np.minimum(starts + k, last)], 0)
+    return chars.view(f"S{width}")[:, 0]
+
+
+def _decode(tokens):
+    """Decode list of (bytes) tokens at once"""
+    if not tokens:
+        return []
+    return b"\n".join(tokens).decode("utf-8").split("\n")
+
+
+def encode_strings(strings):
+    """Encode strings as a uint8 array of newline-terminated strings
+
+    Parameters
+    ----------
+    strings : list of bytes or str
+
+    Returns
+    -------
+    offsets : (n_strings + 1, ) np.ndarray
+        int64 array such that i-th string is data[offsets[i]:offsets[i+1]-1].
+    data : np.ndarray
+        uint8 array of newline-terminated strings.
+    """
+    strings = [s if isinstance(s, bytes) else s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    np.cumsum(
+        np.fromiter(map(len, strings), dtype=np.int64, count=len(strings)) + 1,
+        out=offsets[1:],
+    )
+    data = np.frombuffer(b"\n".join(strings + [b""]), dtype=np.uint8)
+    return offsets, data
+
+
+def read_durations(path):
+    """Parse "{uri} {duration}" table
+
+    Returns
+    -------
+    uri_offsets, uri_data : np.ndarray
+        Uris encoded with `encode_strings`.
+    duration : np.ndarray
+        float64 array of durations.
+    """
+
+    uri_offsets, uri_data, duration = [np.zeros(1, dtype=np.int64)], [], []
+    for chunk in iter_chunks(path):
+        data, starts, ends = _tokenize(chunk, 2, path)
+        # keep uri bytes, and the (whitespace) byte that follows each uri,
+        # which becomes its newline terminator
+        boundaries = np.zeros(len(data) + 1, dtype=np.int8)
+        boundaries[starts[:, 0]] += 1
+        boundaries[ends[:, 0] + 1] -= 1
+        data = data.copy()
+        data[ends[:, 0]] = ord("\n")
+        uri_data.append(data[np.cumsum(boundaries[:-1], dtype=np.int8) > 0])
+        uri_offsets.append(
+            np.cumsum(ends[:, 0] - starts[:, 0] + 1) + uri_offsets[-1][-1]
+        )
+        duration.append(_fixed_width(data, starts[:, 1], ends[:, 1]).astype(np.float64))
+
+    return (
+        np.concatenate(uri_offsets),
+        np.concatenate(uri_data or [np.zeros(0, dtype=np.uint8)]),
+        np.concatenate(duration or [np.zeros(0)]),
+    )
+
+
+def read_trials(path):
+    """Parse "{reference} {file1} {file2}" table
+
+    File names are never decoded: they are gathered straight from the file
+    bytes into fixed-width bytes arrays.
+
+    Returns
+    -------
+    reference : np.ndarray
+        int8 array of references.
+    file1, file2 : np.ndarray
+        Fixed-width bytes ("S") arrays of enrolment and test file names.
+    """
+
+    reference, file1, file2 = [], [], []
+    for chunk in iter_chunks(path):
+        data, starts, ends = _tokenize(chunk, 3, path)
+        reference.append(_fixed_width(data, starts[:, 0], ends[:, 0]).astype(np.int8))
+        file1.append(_fixed_width(data, starts[:, 1], ends[:, 1]))
+        file2.append(_fixed_width(data, starts[:, 2], ends[:, 2]))
+
+    empty = [np.zeros(0, dtype="S1")]
+    return (
+        np.concatenate(reference or [np.zeros(0, dtype=np.int8)]),
+        np.concatenate(file1 or empty),
+        np.concatenate(file2 or empty),
+    )
+
+
+def read_identities(path):
+    """Parse "{speaker_id} {speaker_name}" table
+
+    Returns
+    -------
+    identities : dict
+        Mapping from speaker id to speaker name.
+    """
+    identities = dict()
+    for ids, names in _split(path, 2):
+        identities.update(zip(_decode(ids), _decode(names)))
+    return identities
+
+
+def read_csv(path):
+    """Parse comma-separated table with a header line
+
+    Header and fields are stripped from surrounding whitespace (as well as
+    from byte order mark and carriage returns).
+
+    Returns
+    -------
+    columns : dict
+        {column name: list of str} dictionary.
+    """
+    text = b"".join(iter_chunks(path)).decode("utf-8-sig")
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return dict()
+
+    header = [name.strip() for name in lines[0].split(",")]
+    rows = [[field.strip() for field in line.split(",")] for line in lines[1:]]
+    if any(len(row) != len(header) for row in rows):
+        msg = f"Lines of {path} are expected to contain {len(header)} fields."
+        raise ValueError(msg)
+
+    return {name: [row[c] for row in rows] for c, name in enumerate(header)}
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+"""Lightweight file and trial records
+
+Files yielded by `protocol.train()` (and trials yielded by
+`protocol.test_trial()`) are `ProtocolFile` instances, each made of a copy
+of the protocol preprocessors, a lock, and a few dictionaries. Records
+satisfy the same (mutable) mapping protocol but only hold a reference to
+the shared table they come from, and the index of their row in it:
+
+    >>> for file in protocol.train_records():
+    ...     file["uri"], file["speaker"], file["duration"]
+    ...     file["annotation"]  # built (once) by protocol preprocessors
+
+Values are read from the table arrays when they are accessed. Values set by
+the caller, and values computed by preprocessors, are kept in a dictionary
+that is only allocated when needed. Records are pickled as `ProtocolFile`
+instances (rather than with a reference to the whole table), so that they
+can be sent from data loader workers.
+"""
+
+from collections.abc import MutableMapping
+
+from pyannote.database.protocol.protocol import ProtocolFile
+
+# marks precomputed keys that were deleted by the caller
+_DELETED = object()
+
+# trials themselves are not preprocessed
+_NO_PREPROCESSORS = dict()
+
+
+class Record(MutableMapping):
+    """Base class for records
+
+    Subclasses define their precomputed `KEYS` and read their values in
+    `value(key)`.
+
+    Parameters
+    ----------
+    lazy : dict
+        Preprocessors, shared by all records (and never modified). A key
+        that has a preprocessor is computed, on first access, by applying
+        the preprocessor to the record.
+    """
+
+    __slots__ = ("lazy", "_store")
+
+    KEYS = ()
+
+    def __init__(self, lazy):
+        self.lazy = lazy
+        self._store = None
+
+    def value(self, key):
+        """Get value of precomputed `key`"""
+        raise NotImplementedError()
+
+    def _precomputed(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return self.value(key)
+
+    def __getitem__(self, key):
+
+        store = self._store
+        if store is not None and key in store:
+            value = store[key]
+            if value is _DELETED:
+                raise KeyError(key)
+            return value
+
+        preprocessor = self.lazy.get(key, None)
+        if preprocessor is None:
+            return self._precomputed(key)
+
+        if store is None:
+            store = self._store = dict()
+
+        # while its preprocessor runs, key resolves to its precomputed value
+        if key in self.KEYS:
+            store[key] = self.value(key)
+        try:
+            value = preprocessor(self)
+        except BaseException:
+            store.pop(key, None)
+            raise
+        store[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        if self._store is None:
+            self._store = dict()
+        self._store[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self[key] = _DELETED
+
+    def __contains__(self, key):
+        store = self._store
+        if store is not None and key in store:
+            return store[key] is not _DELETED
+        return key in self.KEYS or key in self.lazy
+
+    def __iter__(self):
+        store = self._store or dict()
+        seen = set()
+        for keys in (self.KEYS, self.lazy, store):
+            for key in keys:
+                if key in seen:
+                    continue
+                seen.add(key)
+                if store.get(key, None) is not _DELETED:
+                    yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        keys = ", ".join(repr(key) for key in self)
+        return f"<{self.__class__.__name__} {{{keys}}}>"
+
+    def __reduce__(self):
+        store = self._store or dict()
+        precomputed = {
+            key: self.value(key)
+            for key in self.KEYS
+            if key not in store and key not in self.lazy
+        }
+        precomputed.update(
+            (key, value) for key, value in store.items() if value is not _DELETED
+        )
+        lazy = {key: value for key, value in self.lazy.items() if key not in store}
+        return ProtocolFile, (precomputed, lazy)
+
+
+class FileRecord(Record):
+    """File of a file table
+
+    Same keys as files yielded by `protocol.train()`: "uri", "database",
+    "duration", and "speaker" (plus preprocessed "annotation" and
+    "annotated").
+
+    Parameters
+    ----------
+    table : FileTable
+        Table of files.
+    index : int
+        Index of file in `table`.
+    lazy : dict
+        Preprocessors.
+    """
+
+    __slots__ = ("table", "index")
+
+    KEYS = ("uri", "database", "duration", "speaker")
+
+    def __init__(self, table, index, lazy):
+        super().__init__(lazy)
+        self.table = table
+        self.index = index
+
+    def value(self, key):
+        if key == "uri":
+            return self.table.get_uri(self.index)
+        if key == "database":
+            return "VoxCeleb"
+        if key == "duration":
+            return float(self.table.duration[self.index])
+        return self.table.get_speaker(self.index)
+
+
+class TrialFileRecord(FileRecord):
+    """File of a trial
+
+    Same keys as trial files yielded by `protocol.test_trial()`: "uri",
+    "database", and "try_with" (built on first access).
+    """
+
+    __slots__ = ()
+
+    KEYS = ("uri", "database", "try_with")
+
+    def value(self, key):
+        if key != "try_with":
+            return super().value(key)
+
+        from pyannote.core import Segment, Timeline
+
+        uri = self.table.get_uri(self.index)
+        segment = Segment(0, float(self.table.duration[self.index]))
+        try_with = Timeline(segments=[segment], uri=uri)
+        # build timeline only once
+        self[key] = try_with
+        return try_with
+
+
+class TrialRecord(Record):
+    """Trial of a trial table
+
+    Same keys as trials yielded by `protocol.test_trial()`: "reference",
+    "file1", and "file2" (both `TrialFileRecord`).
+
+    Parameters
+    ----------
+    reference : int
+        1 for same speaker trials, 0 otherwise.
+    file1, file2 : TrialFileRecord
+        Enrolment and test files.
+    """
+
+    __slots__ = ("reference", "file1", "file2")
+
+    KEYS = ("reference", "file1", "file2")
+
+    def __init__(self, reference, file1, file2):
+        super().__init__(_NO_PREPROCESSORS)
+        self.reference = reference
+        self.file1 = file1
+        self.file2 = file2
+
+    def value(self, key):
+        return getattr(self, key)
+
+    def __reduce__(self):
+        return dict, ({key: self[key] for key in self},)
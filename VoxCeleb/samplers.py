@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+"""Infinite, seedable samplers of training files
+
+Samplers yield arrays of file indices (into `protocol.train_table()` and
+`protocol.train_view()`) and never end. Each batch is drawn from its own
+random generator, seeded with (seed, batch index), so that batches are
+reproducible and do not depend on how they are distributed: with several
+ranks and/or data loader workers, each of them draws a distinct subset of
+batch indices, and no batch is ever drawn twice.
+"""
+
+import sys
+
+import numpy as np
+
+
+def get_worker_info():
+    """Get (worker_id, num_workers) of current torch data loader worker
+
+    Returns (0, 1) outside of data loader workers (or when torch is not used).
+    """
+    # no need to import torch if it has not been imported already
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return 0, 1
+    info = torch.utils.data.get_worker_info()
+    if info is None:
+        return 0, 1
+    return info.id, info.num_workers
+
+
+def choice(rng, n, k):
+    """Draw `k` distinct integers in [0, n)
+
+    This is Robert Floyd's algorithm, which costs O(k) whatever `n`.
+
+    Parameters
+    ----------
+    rng : np.random.Generator
+        Random generator.
+    n : int
+        Number of possible values.
+    k : int
+        Number of integers.
+
+    Returns
+    -------
+    samples : (k, ) np.ndarray
+        Drawn integers, in random order.
+    """
+    selected = set()
+    for j, x in enumerate(rng.random(k).tolist(), start=n - k + 1):
+        t = int(x * j)
+        selected.add(j - 1 if t in selected else t)
+    return rng.permutation(np.fromiter(selected, dtype=np.int64, count=k))
+
+
+def sample_distinct(rng, counts, k):
+    """Draw `k` distinct integers in [0, counts[i]) for every i
+
+    This is Robert Floyd's algorithm, vectorized over rows, and therefore
+    costs O(len(counts) * k²) whatever `counts`. Rows with less than `k`
+    possible values are drawn with replacement.
+
+    Parameters
+    ----------
+    rng : np.random.Generator
+        Random generator.
+    counts : (n_rows, ) np.ndarray
+        Number of possible values for each row.
+    k : int
+        Number of integers per row.
+
+    Returns
+    -------
+    samples : (n_rows, k) np.ndarray
+        Drawn integers.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    random = rng.random((len(counts), k))
+
+    upper = counts[:, None] - k + 1 + np.arange(k)
+    samples = (random * np.maximum(upper, 1)).astype(np.int64)
+    for j in range(1, k):
+        duplicate = np.any(samples[:, :j] == samples[:, j, None], axis=1)
+        samples[duplicate, j] = upper[duplicate, j] - 1
+
+    short = counts < k
+    if np.any(short):
+        samples[short] = (random[short] * counts[short, None]).astype(np.int64)
+
+    return samples
+
+
+class Sampler:
+    """Base class for infinite samplers
+
+    Parameters
+    ----------
+    seed : int, optional
+        Random seed. Defaults to 0.
+    rank, world_size : int, optional
+        Only draw the `rank`-th out of every `world_size` batches.
+        Defaults to drawing all batches.
+    start : int, optional
+        Index of the first batch (e.g. to resume training). Defaults to 0.
+    """
+
+    def __init__(self, seed=0, rank=0, world_size=1, start=0):
+        if not 0 <= rank < world_size:
+            raise ValueError(f"Invalid rank ({rank}) for world size {world_size}.")
+        self.seed = seed
+        self.rank = rank
+        self.world_size = world_size
+        self.start = start
+
+    def batch(self, b):
+        """Draw `b`-th batch"""
+        raise NotImplementedError()
+
+    def rng(self, b):
+        """Get random generator of `b`-th batch"""
+        return np.random.default_rng([self.seed, b])
+
+    def __iter__(self):
+        worker_id, num_workers = get_worker_info()
+        step = self.world_size * num_workers
+        b = self.start + self.rank * num_workers + worker_id
+        while True:
+            yield self.batch(b)
+            b += step
+
+
+class SpeakerBatchSampler(Sampler):
+    """Infinite sampler of speaker-balanced batches
+
+    Each batch is made of `num_files` files from each of `num_speakers`
+    distinct speakers, grouped by speaker. Files of a speaker are distinct
+    unless the speaker has less than `num_files` files. Drawing a batch costs
+    O(num_speakers * num_files²), whatever the number of speakers and files
+    in the subset.
+
+    Parameters
+    ----------
+    index : SpeakerIndex
+        Speaker index of the subset (e.g. `protocol.train_speaker_index()`).
+    num_speakers : int
+        Number of speakers per batch (P).
+    num_files : int
+        Number of files per speaker (K).
+    seed : int, optional
+        Random seed. Defaults to 0.
+    rank, world_size : int, optional
+        Only draw the `rank`-th out of every `world_size` batches.
+        Defaults to drawing all batches.
+    start : int, optional
+        Index of the first batch (e.g. to resume training). Defaults to 0.
+
+    Usage
+    -----
+    >>> files = protocol.train_view()
+    >>> sampler = protocol.train_speaker_batches(num_speakers=64, num_files=4)
+    >>> for batch in sampler:
+    ...     labels = sampler.index.labels[batch]  # (P * K, ) speaker ids
+    ...     audio = [load(files[i]) for i in batch]
+
+    When iterated from torch data loader workers, batches are further split
+    between workers.
+    """
+
+    def __init__(
+        self, index, num_speakers, num_files, seed=0, rank=0, world_size=1, start=0
+    ):
+        super().__init__(seed=seed, rank=rank, world_size=world_size, start=start)
+        if num_speakers > len(index):
+            msg = f"Cannot draw {num_speakers} speakers out of {len(index)}."
+            raise ValueError(msg)
+        self.index = index
+        self.num_speakers = num_speakers
+        self.num_files = num_files
+
+    def batch(self, b):
+        """Draw `b`-th batch
+
+        Parameters
+        ----------
+        b : int
+            Batch index.
+
+        Returns
+        -------
+        batch : (num_speakers * num_files, ) np.ndarray
+            Indices of files.
+        """
+        rng = self.rng(b)
+        speakers = choice(rng, len(self.index), self.num_speakers)
+        files = sample_distinct(rng, self.index.counts[speakers], self.num_files)
+        return self.index.order[self.index.offsets[speakers, None] + files].ravel()
+
+
+class ChunkSampler(Sampler):
+    """Infinite sampler of fixed-duration chunks
+
+    Files are drawn with a probability proportional to their duration, and
+    chunks are drawn uniformly within files, by drawing positions uniformly
+    in the concatenation of all files: the file a position falls into is
+    found by binary search in the cumulative duration array. A whole batch
+    is drawn at once, in O(batch_size * log(n_files)).
+
+    Parameters
+    ----------
+    durations : (n_files, ) np.ndarray
+        Duration of each file (e.g. `protocol.train_table().duration`).
+    duration : float
+        Chunk duration, in seconds.
+    batch_size : int
+        Number of chunks per batch.
+    policy : {"exclude", "pad"}, optional
+        What to do with files shorter than `duration`. "exclude" (default)
+        never draws them. "pad" draws them like any other file, with a chunk
+        starting at 0 (and going beyond the end of the file, which is left
+        to the caller to pad).
+    seed, rank, world_size, start : int, optional
+        See `Sampler`.
+
+    Usage
+    -----
+    >>> files = protocol.train_view()
+    >>> sampler = protocol.train_chunk_batches(duration=2.0, batch_size=128)
+    >>> for indices, offsets in sampler:
+    ...     chunks = [crop(files[i], offset, 2.0) for i, offset in zip(indices, offsets)]
+    """
+
+    def __init__(
+        self,
+        durations,
+        duration,
+        batch_size,
+        policy="exclude",
+        seed=0,
+        rank=0,
+        world_size=1,
+        start=0,
+    ):
+        super().__init__(seed=seed, rank=rank, world_size=world_size, start=start)
+
+        durations = np.asarray(durations, dtype=np.float64)
+        if policy == "exclude":
+            files = np.flatnonzero(durations >= duration)
+        elif policy == "pad":
+            files = np.flatnonzero(durations > 0)
+        else:
+            raise ValueError(f'policy must be "exclude" or "pad" (got "{policy}").')
+        if len(files) == 0:
+            raise ValueError(f"No file is long enough for {duration}s chunks.")
+
+        self.duration = duration
+        self.batch_size = batch_size
+        self.policy = policy
+        self.files = files
+        self.durations = durations[files]
+        self.cumulative = np.cumsum(self.durations)
+
+    def batch(self, b):
+        """Draw `b`-th batch
+
+        Parameters
+        ----------
+        b : int
+            Batch index.
+
+        Returns
+        -------
+        indices : (batch_size, ) np.ndarray
+            Indices of files.
+        offsets : (batch_size, ) np.ndarray
+            Start time of chunks (in seconds, relative to the file start).
+        """
+        rng = self.rng(b)
+        positions = rng.random(self.batch_size) * self.cumulative[-1]
+        i = np.searchsorted(self.cumulative, positions, side="right")
+        i = np.minimum(i, len(self.files) - 1)
+        durations = self.durations[i]
+        # relative position within the file, rescaled to possible chunk starts
+        ratio = (positions - (self.cumulative[i] - durations)) / durations
+        offsets = np.clip(ratio, 0.0, 1.0) * np.maximum(durations - self.duration, 0.0)
+        return self.files[i], offsets
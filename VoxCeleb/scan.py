@@ -0,0 +1,548 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+"""Build duration tables by scanning a local copy of VoxCeleb
+
+Only audio file headers are read (no audio is decoded), by a pool of threads
+(or processes): WAV files, and original VoxCeleb 2 M4A files, are supported.
+Files are found using the same templates as in `database.yml` (see README),
+where "{uri}" stands for "{speaker}/{video}/{utterance}":
+
+    $ python -m VoxCeleb.scan vox2_dev "/path/to/voxceleb2/dev/aac/{uri}.m4a" \\
+                              --output-dir ~/voxceleb-tables
+    $ export PYANNOTE_VOXCELEB_DATA=~/voxceleb-tables
+
+writes "vox2_dev_duration.txt.gz" into "~/voxceleb-tables", where protocols
+look for duration tables before falling back to the ones shipped with the
+package. Output directory defaults to the first directory listed in
+`PYANNOTE_VOXCELEB_DATA`, and must be given explicitly (`--output-dir`) when
+this variable is not set: tables are never written into the package itself.
+
+Scanned durations are appended to a ".partial" file as they come, so that an
+interrupted scan resumes where it stopped when run again.
+
+Use `--verify` to compare scanned durations with the current table instead
+of writing a new one.
+"""
+
+import argparse
+import gzip
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from glob import iglob
+from pathlib import Path
+
+# number of files scanned between two checkpoints of the ".partial" file
+BATCH_SIZE = 1024
+
+
+def wav_duration(path):
+    """Get duration of a WAV file from its header
+
+    Parameters
+    ----------
+    path : str
+        Path to WAV file.
+
+    Returns
+    -------
+    duration : float
+        Duration in seconds.
+    """
+
+    with open(path, "rb") as f:
+
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:] != b"WAVE":
+            raise ValueError(f"{path} is not a WAV file.")
+
+        sample_rate, block_align = None, None
+        while True:
+
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                raise ValueError(f"Could not find 'data' chunk in {path}.")
+            chunk_id, chunk_size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+
+            if chunk_id == b"fmt ":
+                fmt = f.read(chunk_size)
+                _, _, sample_rate, _, block_align = struct.unpack("<HHIIH", fmt[:14])
+                if sample_rate == 0 or block_align == 0:
+                    raise ValueError(
+                        f"Invalid 'fmt ' chunk in {path} (sample rate: "
+                        f"{sample_rate}, block align: {block_align})."
+                    )
+                f.seek(chunk_size % 2, os.SEEK_CUR)
+
+            elif chunk_id == b"data":
+                if sample_rate is None:
+                    raise ValueError(f"'fmt ' chunk is missing in {path}.")
+                # streamed or truncated files advertise a wrong data size
+                available = os.fstat(f.fileno()).st_size - f.tell()
+                num_samples = min(chunk_size, available) // block_align
+                return num_samples / sample_rate
+
+            else:
+                f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+
+def _iter_boxes(data):
+    """Iterate over (type, payload) of MP4 boxes contained in `data`"""
+    position = 0
+    while position + 8 <= len(data):
+        size, box_type = struct.unpack(">I4s", data[position : position + 8])
+        header_size = 8
+        if size == 1:
+            (size,) = struct.unpack(">Q", data[position + 8 : position + 16])
+            header_size = 16
+        elif size == 0:
+            size = len(data) - position
+        if size < header_size:
+            raise ValueError(f"Invalid MP4 box size ({size}).")
+        yield box_type, data[position + header_size : position + size]
+        position += size
+
+
+def _header_duration(payload):
+    """Get (duration, timescale) of "mvhd" or "mdhd" box payload"""
+    # version 1 uses 64 bits for dates and duration
+    if payload[0] == 1:
+        timescale, duration = struct.unpack(">IQ", payload[20:32])
+    else:
+        timescale, duration = struct.unpack(">II", payload[12:20])
+    if timescale == 0:
+        raise ValueError("Invalid MP4 time scale (0).")
+    return duration, timescale
+
+
+def _edit_list(payload):
+    """Get (segment duration, media time) entries of "elst" box payload"""
+    # version 1 uses 64 bits for segment duration and media time
+    version, (num_entries,) = payload[0], struct.unpack(">I", payload[4:8])
+    entry = ">Qq4x" if version == 1 else ">Ii4x"
+    size = struct.calcsize(entry)
+    return [
+        struct.unpack(entry, payload[8 + i * size : 8 + (i + 1) * size])
+        for i in range(num_entries)
+    ]
+
+
+def _track_duration(trak, movie_timescale):
+    """Get duration of "trak" box payload (None if it is not an audio track)
+
+    AAC encoders prepend (priming) and append (padding) samples that are not
+    part of the audio: the edit list ("elst" box) tells which part of the
+    media is actually presented.
+    """
+    handler, media, edits = None, None, []
+    for box_type, payload in _iter_boxes(trak):
+        if box_type == b"edts":
+            for box_type, elst in _iter_boxes(payload):
+                if box_type == b"elst":
+                    edits = _edit_list(elst)
+        elif box_type == b"mdia":
+            for box_type, mdia in _iter_boxes(payload):
+                if box_type == b"hdlr":
+                    handler = mdia[8:12]
+                elif box_type == b"mdhd":
+                    media = _header_duration(mdia)
+    if handler != b"soun" or media is None:
+        return None
+    duration, timescale = media
+
+    # empty edits (media time = -1) only delay presentation
+    edits = [(segment, time) for segment, time in edits if time >= 0]
+    if edits and all(segment > 0 for segment, _ in edits):
+        # segment durations are expressed in movie time scale
+        return sum(segment for segment, _ in edits) / movie_timescale
+    if len(edits) == 1:
+        # zero segment duration stands for "until the end of the media"
+        _, time = edits[0]
+        return max(duration - time, 0) / timescale
+    return duration / timescale
+
+
+def mp4_duration(path):
+    """Get duration of a MP4/M4A file from its "moov" box
+
+    Top-level boxes are skipped (not read) until the "moov" box is found,
+    wherever it is in the file. Duration of the first audio track is
+    returned: its edited duration ("elst" box) when it has an edit list,
+    so that encoder priming and padding samples are not counted, or its
+    media duration ("mdhd" box) otherwise. It falls back to movie duration
+    ("mvhd" box) if there is no audio track.
+
+    Parameters
+    ----------
+    path : str
+        Path to MP4/M4A file.
+
+    Returns
+    -------
+    duration : float
+        Duration in seconds.
+    """
+
+    with open(path, "rb") as f:
+
+        file_size = os.fstat(f.fileno()).st_size
+        position, moov = 0, None
+        while position + 8 <= file_size:
+            f.seek(position)
+            header = f.read(16)
+            size, box_type = struct.unpack(">I4s", header[:8])
+            header_size = 8
+            if size == 1:
+                (size,) = struct.unpack(">Q", header[8:16])
+                header_size = 16
+            elif size == 0:
+                size = file_size - position
+            if size < header_size:
+                raise ValueError(f"Invalid MP4 box size ({size}) in {path}.")
+            if box_type == b"moov":
+                f.seek(position + header_size)
+                moov = f.read(size - header_size)
+                break
+            position += size
+
+    if moov is None:
+        raise ValueError(f"Could not find 'moov' box in {path}.")
+
+    boxes = list(_iter_boxes(moov))
+    movie = next((payload for box_type, payload in boxes if box_type == b"mvhd"), None)
+    if movie is None:
+        raise ValueError(f"Could not find 'mvhd' box in {path}.")
+    duration, timescale = _header_duration(movie)
+
+    for box_type, payload in boxes:
+        if box_type == b"trak":
+            track = _track_duration(payload, timescale)
+            if track is not None:
+                return track
+
+    return duration / timescale
+
+
+# audio header parsers, indexed by file extension
+PROBES = {".wav": wav_duration, ".m4a": mp4_duration, ".mp4": mp4_duration}
+
+
+def probe(path):
+    """Get duration of an audio file from its header
+
+    Parameters
+    ----------
+    path : str
+        Path to audio file. Its extension must be one of `PROBES`.
+
+    Returns
+    -------
+    duration : float
+        Duration in seconds.
+    """
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix not in PROBES:
+        raise ValueError(f"Unsupported audio file extension: {path}.")
+    return PROBES[suffix](path)
+
+
+def find_files(template):
+    """Find audio files matching a `database.yml` template
+
+    Parameters
+    ----------
+    template : str
+        Path template, where "{uri}" stands for "{speaker}/{video}/{utterance}"
+        (e.g. "/path/to/voxceleb1/dev/wav/{uri}.wav").
+
+    Returns
+    -------
+    files : dict
+        {uri: path} dictionary.
+    """
+    template = os.path.expanduser(template)
+    if template.count("{uri}") != 1:
+        raise ValueError(f'Template must contain "{{uri}}" exactly once: {template}')
+    prefix, suffix = template.split("{uri}")
+    pattern = prefix + os.path.join("*", "*", "*") + suffix
+    return {
+        path[len(prefix) : len(path) - len(suffix)].replace(os.sep, "/"): path
+        for path in iglob(pattern)
+    }
+
+
+def format_duration(duration):
+    """Format duration the way tables shipped with the package do"""
+    return f"{duration:.6f}".rstrip("0").rstrip(".")
+
+
+def read_partial(path):
+    """Read durations checkpointed by an interrupted scan"""
+
+    durations = dict()
+    if not path.is_file():
+        return durations
+
+    with open(path, "rb+") as f:
+        content = f.read()
+        # last line may have been cut by the interruption
+        end = content.rfind(b"\n") + 1
+        f.truncate(end)
+
+    for line in content[:end].decode("utf-8").splitlines():
+        uri, duration = line.split()
+        durations[uri] = float(duration)
+
+    return durations
+
+
+def _probe(path):
+    """Same as `probe`, returning (duration, error message) tuples"""
+    try:
+        return probe(path), None
+    except (OSError, ValueError, struct.error) as e:
+        return None, str(e)
+
+
+def scan(files, partial=None, num_workers=None, processes=False, verbose=False):
+    """Scan durations of audio files
+
+    Parameters
+    ----------
+    files : dict
+        {uri: path} dictionary, as returned by `find_files`.
+    partial : Path, optional
+        Checkpoint file. Durations already in there are not scanned again,
+        and new durations are appended to it as they come.
+    num_workers : int, optional
+        Number of workers. Defaults to `concurrent.futures` default.
+    processes : bool, optional
+        Use a pool of processes instead of threads.
+    verbose : bool, optional
+        Report progress on standard error.
+
+    Returns
+    -------
+    durations : dict
+        {uri: duration} dictionary of successfully scanned files.
+    errors : dict
+        {uri: error message} dictionary of files that could not be scanned.
+    """
+
+    durations = dict() if partial is None else read_partial(partial)
+    durations = {uri: d for uri, d in durations.items() if uri in files}
+    todo = sorted(uri for uri in files if uri not in durations)
+    errors = dict()
+
+    if verbose and durations:
+        print(f"Resuming: {len(durations)} files already scanned.", file=sys.stderr)
+
+    # chunks amortize inter-process communication (and are useless for threads)
+    if processes:
+        Executor, chunksize = ProcessPoolExecutor, 64
+    else:
+        Executor, chunksize = ThreadPoolExecutor, 1
+    checkpoint = None if partial is None else open(partial, "a")
+    try:
+        with Executor(max_workers=num_workers) as executor:
+            for start in range(0, len(todo), BATCH_SIZE):
+                batch = todo[start : start + BATCH_SIZE]
+                paths = [files[uri] for uri in batch]
+                results = executor.map(_probe, paths, chunksize=chunksize)
+                lines = []
+                for uri, (duration, error) in zip(batch, results):
+                    if error is not None:
+                        errors[uri] = error
+                        continue
+                    durations[uri] = duration
+                    lines.append(f"{uri} {format_duration(duration)}\n")
+                if checkpoint is not None:
+                    checkpoint.writelines(lines)
+                    checkpoint.flush()
+                if verbose:
+                    done = start + len(batch)
+                    print(f"Scanned {done}/{len(todo)} files.", file=sys.stderr)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+    return durations, errors
+
+
+def write_durations(path, durations):
+    """Write "{uri} {duration}" table
+
+    Parameters
+    ----------
+    path : Path
+        Path to (gzipped) output table. It is written atomically.
+    durations : dict
+        {uri: duration} dictionary.
+    """
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.tmp")
+    text = "".join(
+        f"{uri} {format_duration(durations[uri])}\n" for uri in sorted(durations)
+    )
+    # mtime=0 makes gzipped tables reproducible
+    with open(tmp, "wb") as f:
+        with gzip.GzipFile(filename="", mode="wb", fileobj=f, mtime=0) as g:
+            g.write(text.encode("utf-8"))
+    os.replace(tmp, path)
+
+
+def verify(name, durations, tolerance=1e-3):
+    """Compare scanned durations with current table
+
+    Parameters
+    ----------
+    name : str
+        Table name (e.g. "vox1_dev").
+    durations : dict
+        {uri: duration} dictionary of scanned durations.
+    tolerance : float, optional
+        Maximum difference (in seconds) for durations to be considered equal.
+
+    Returns
+    -------
+    missing : list of str
+        Files of the current table that were not scanned.
+    extra : list of str
+        Scanned files that are not in the current table.
+    mismatch : list of (str, float, float) tuples
+        (uri, current duration, scanned duration) of files whose durations
+        differ by more than `tolerance`.
+    """
+    from .tables import load_durations
+
+    table = load_durations(name)
+    current = dict(zip(table.uris, table.duration.tolist()))
+    missing = sorted(set(current) - set(durations))
+    extra = sorted(set(durations) - set(current))
+    mismatch = [
+        (uri, current[uri], durations[uri])
+        for uri in sorted(set(current) & set(durations))
+        if abs(current[uri] - durations[uri]) > tolerance
+    ]
+    return missing, extra, mismatch
+
+
+def main():
+
+    from .tables import get_data_dirs
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("name", help='table name (e.g. "vox2_dev")')
+    parser.add_argument(
+        "templates",
+        nargs="+",
+        metavar="template",
+        help='path template (e.g. "/path/to/voxceleb2/dev/aac/{uri}.wav")',
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=None,
+        help="where to write the table (defaults to the first directory "
+        "listed in PYANNOTE_VOXCELEB_DATA)",
+    )
+    parser.add_argument("--num-workers", type=int, default=None)
+    parser.add_argument(
+        "--processes", action="store_true", help="use processes instead of threads"
+    )
+    parser.add_argument(
+        "--verify", action="store_true", help="compare with current table"
+    )
+    args = parser.parse_args()
+
+    # never default to the package data directory (e.g. site-packages)
+    if args.output_dir is None and not args.verify:
+        data_dirs = get_data_dirs()[:-1]
+        if not data_dirs:
+            parser.error(
+                "--output-dir is required when PYANNOTE_VOXCELEB_DATA is not set"
+            )
+        args.output_dir = data_dirs[0]
+    elif args.output_dir is not None:
+        args.output_dir = args.output_dir.expanduser()
+
+    files = dict()
+    for template in args.templates:
+        files.update(find_files(template))
+    print(f"Found {len(files)} files.", file=sys.stderr)
+    if not files:
+        return 1
+
+    if args.verify:
+        durations, errors = scan(
+            files, num_workers=args.num_workers, processes=args.processes
+        )
+        missing, extra, mismatch = verify(args.name, durations)
+        print(f"{len(missing)} missing files: {' '.join(missing[:5])}")
+        print(f"{len(extra)} extra files: {' '.join(extra[:5])}")
+        print(f"{len(mismatch)} files with different durations:")
+        for uri, current, scanned in mismatch[:5]:
+            print(f"  {uri}: {current:g} (current) vs. {scanned:g} (scanned)")
+        print(f"{len(errors)} files could not be scanned.")
+        return 1 if missing or extra or mismatch or errors else 0
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    output = args.output_dir / f"{args.name}_duration.txt.gz"
+    partial = args.output_dir / f".{args.name}_duration.txt.partial"
+    durations, errors = scan(
+        files,
+        partial=partial,
+        num_workers=args.num_workers,
+        processes=args.processes,
+        verbose=True,
+    )
+
+    for uri, error in sorted(errors.items()):
+        print(f"Could not scan {uri}: {error}", file=sys.stderr)
+    if errors:
+        print(
+            f"{len(errors)} files could not be scanned: run again to retry.",
+            file=sys.stderr,
+        )
+        return 1
+
+    write_durations(output, durations)
+    partial.unlink()
+    print(output)
+    if args.output_dir not in get_data_dirs():
+        print(
+            f"Add {args.output_dir} to PYANNOTE_VOXCELEB_DATA for protocols to use it.",
+            file=sys.stderr,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1588 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+"""Compiled and cached tables
+
+Duration and trial tables shipped in `data/` are compiled once into
+memory-mappable numpy arrays stored in a cache directory, so that protocols
+do not have to parse gzipped text every time they are iterated.
+
+The cache directory defaults to `~/.cache/pyannote/VoxCeleb` and can be set
+with the `PYANNOTE_VOXCELEB_CACHE` environment variable. Compiled tables are
+keyed on the package version and on the hash of their source files, so that
+a stale cache is never used.
+
+Tables can be compiled ahead of time (e.g. before spawning data loaders):
+
+    $ python -m VoxCeleb
+
+Within a process, loaded tables are memoized in `cache`, a bounded and
+thread-safe cache shared by all protocols:
+
+    >>> from VoxCeleb.tables import cache
+    >>> cache.info()
+    CacheInfo(hits=3, misses=2, maxsize=16, currsize=2)
+    >>> cache.clear()
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+
+from .parsers import (
+    _fixed_width,
+    encode_strings,
+    read_csv,
+    read_durations,
+    read_identities,
+    read_trials,
+)
+from .timing import timer
+
+DATA_DIR = Path(__file__).parent / "data"
+
+
+def get_data_dirs():
+    """Return directories where duration tables are looked for
+
+    Directories listed in the `PYANNOTE_VOXCELEB_DATA` environment variable
+    (e.g. where `python -m VoxCeleb.scan` wrote tables) come first, followed
+    by the directory of tables shipped with the package.
+    """
+    data_dirs = os.environ.get("PYANNOTE_VOXCELEB_DATA", "")
+    return [Path(d).expanduser() for d in data_dirs.split(os.pathsep) if d] + [DATA_DIR]
+
+
+def get_cache_dir():
+    """Return path to the directory where compiled tables are stored"""
+
+    from . import __version__
+
+    cache_dir = os.environ.get("PYANNOTE_VOXCELEB_CACHE")
+    if cache_dir is None:
+        xdg_cache_home = os.environ.get("XDG_CACHE_HOME", "~/.cache")
+        cache_dir = Path(xdg_cache_home) / "pyannote" / "VoxCeleb"
+    return Path(cache_dir).expanduser() / __version__
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+UriCodes = namedtuple(
+    "UriCodes", ["speakers", "speaker_code", "videos", "video_code", "utterance"]
+)
+
+TableStatistics = namedtuple(
+    "TableStatistics",
+    ["num_files", "num_speakers", "total_duration", "speaker_duration"],
+)
+
+
+class TableCache:
+    """Bounded, thread-safe, least-recently-used cache of loaded tables
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        Maximum number of tables kept in cache. Defaults to 16.
+    """
+
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._tables = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key, load):
+        """Get table from cache, loading it with `load()` on cache miss"""
+
+        # loading happens while holding the lock so that concurrent
+        # threads asking for the same table only load it once
+        with self._lock:
+            if key in self._tables:
+                self.hits += 1
+                self._tables.move_to_end(key)
+                return self._tables[key]
+
+            self.misses += 1
+            table = load()
+            self._tables[key] = table
+            while len(self._tables) > self.maxsize:
+                self._tables.popitem(last=False)
+            return table
+
+    def evict(self, key):
+        """Remove table from cache (if it is there)"""
+        with self._lock:
+            self._tables.pop(key, None)
+
+    def clear(self):
+        """Remove all tables from cache and reset statistics"""
+        with self._lock:
+            self._tables.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """Report cache statistics"""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._tables))
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._tables
+
+
+cache = TableCache()
+
+
+def check_shard(rank, world_size):
+    """Raise ValueError unless `rank` is a valid shard out of `world_size`"""
+    if world_size < 1 or not 0 <= rank < world_size:
+        msg = f"Invalid shard (rank={rank}, world_size={world_size})."
+        raise ValueError(msg)
+
+
+def shard_indices(weights, rank, world_size):
+    """Deterministically split items into shards of balanced total weight
+
+    Items are sorted by decreasing weight (ties broken by index) and dealt
+    to shards in a back-and-forth (0, 1, ..., K-1, K-1, ..., 1, 0, 0, 1, ...)
+    order, which balances total weight across shards.
+
+    Parameters
+    ----------
+    weights : (n_items, ) np.ndarray
+        Weight of each item (e.g. its duration).
+    rank : int
+        Index of requested shard, between 0 and `world_size` - 1.
+    world_size : int
+        Number of shards.
+
+    Returns
+    -------
+    indices : (n_items_in_shard, ) np.ndarray
+        Sorted indices of items in requested shard.
+    """
+
+    check_shard(rank, world_size)
+
+    weights = np.asarray(weights)
+    order = np.argsort(-weights, kind="stable")
+    position = np.arange(len(order)) % (2 * world_size)
+    shard = np.where(position < world_size, position, 2 * world_size - 1 - position)
+    return np.sort(order[shard == rank])
+
+
+def _decode_fixed_width(names):
+    """Decode fixed-width (utf-8) bytes array into str array"""
+    # np.char.decode returns float64 arrays when empty
+    return np.char.decode(names, "utf-8").astype(str)
+
+
+def _encode_fixed_width(names):
+    """Encode str array into (utf-8) fixed-width bytes array"""
+    # np.char.encode returns float64 arrays when empty
+    return np.char.encode(names, "utf-8").astype(bytes)
+
+
+def _chars(names):
+    """View fixed-width bytes array as (n_names, width) uint8 array"""
+    names = np.ascontiguousarray(names)
+    return names.view(np.uint8).reshape(len(names), names.itemsize)
+
+
+def _merge_codes(dictionaries, codes):
+    """Merge integer codes of several tables into global ones
+
+    Only (small) dictionaries are sorted, codes are simply remapped.
+
+    Parameters
+    ----------
+    dictionaries : list of np.ndarray
+        Sorted dictionary of each table.
+    codes : list of np.ndarray
+        Codes of each table, indexing its dictionary.
+
+    Returns
+    -------
+    dictionary : np.ndarray
+        Sorted union of dictionaries.
+    codes : np.ndarray
+        Concatenated codes, indexing `dictionary`.
+    """
+    dictionary, inverse = np.unique(
+        np.concatenate(list(dictionaries) + [np.zeros(0, dtype=str)]),
+        return_inverse=True,
+    )
+    merged, start = [np.zeros(0, dtype=np.int32)], 0
+    for local, code in zip(dictionaries, codes):
+        merged.append(inverse[start : start + len(local)][code].astype(np.int32))
+        start += len(local)
+    return dictionary, np.concatenate(merged)
+
+
+class FileTable:
+    """Columnar table of VoxCeleb files
+
+    Parameters
+    ----------
+    uri_offsets : (n_files + 1, ) np.ndarray
+        Offset of each uri in `uri_data`. None for tables built by
+        `from_codes`.
+    uri_data : np.ndarray
+        uint8 array containing all newline-separated uris. None for tables
+        built by `from_codes`.
+    duration : (n_files, ) np.ndarray
+        float64 array containing the duration of each file (in seconds).
+    speaker : (n_files, ) np.ndarray, optional
+        Speaker label of each file. Defaults to the speaker id found in its uri.
+
+    Usage
+    -----
+    >>> table = protocol.train_table()
+    >>> table.uri        # (n_files, ) array of uris ("id10001/1zcIwhmdeo4/00001")
+    >>> table.speaker    # (n_files, ) array of speakers ("id10001")
+    >>> table.video      # (n_files, ) array of YouTube video ids ("1zcIwhmdeo4")
+    >>> table.utterance  # (n_files, ) array of utterance indices (1)
+    >>> table.duration   # (n_files, ) array of durations (8.12)
+
+    Uri components are integer-coded (see `codes`), so that "speaker",
+    "video", and "utterance" columns are gathered from small dictionaries
+    rather than split from decoded uris. Compiled tables only store these
+    codes (and the number of digits of utterances) when they are enough to
+    rebuild uris exactly, and uris are only built (and decoded) on demand.
+    Other tables store uris as utf-8 bytes. Tables whose uris do not follow
+    the "{speaker}/{video}/{utterance}" layout have no "video" nor
+    "utterance" columns, and their speaker defaults to the first component
+    of uris.
+    """
+
+    def __init__(self, uri_offsets, uri_data, duration, speaker=None):
+        self._uri_offsets = uri_offsets
+        self._uri_data = uri_data
+        self.duration = duration
+        self._speaker = speaker
+        self._uris = None
+        self._uri = None
+        self._codes = None
+        # number of digits of (zero-padded) utterances, when it is the same
+        # for all files (i.e. when uris can be rebuilt from their codes)
+        self._width = None
+        self._names = None
+        self._encoded = None
+        self._speaker_index = None
+
+    def __len__(self):
+        return len(self.duration)
+
+    @property
+    def uri_offsets(self):
+        """(n_files + 1, ) array of offsets of each uri in `uri_data`
+
+        Tables built by `from_codes` build it (and `uri_data`) on first
+        access, and keep it.
+        """
+        if self._uri_offsets is None:
+            self._uri_offsets, self._uri_data = self._uri_bytes()
+        return self._uri_offsets
+
+    @property
+    def uri_data(self):
+        """uint8 array containing all newline-separated uris
+
+        See `uri_offsets`.
+        """
+        if self._uri_data is None:
+            self._uri_offsets, self._uri_data = self._uri_bytes()
+        return self._uri_data
+
+    def _assemble(self, indices):
+        """Build (uri_offsets, uri_data) of selected files from their codes"""
+        codes = self.codes()
+        if self._encoded is None:
+            self._encoded = (
+                _chars(_encode_fixed_width(codes.speakers)),
+                _chars(_encode_fixed_width(codes.videos)),
+            )
+        speakers, videos = self._encoded
+        s, v, w = speakers.shape[1], videos.shape[1], self._width
+
+        # "{speaker}/{video}/{utterance}\n" rows, where shorter speakers and
+        # videos are padded with null bytes (that uris do not contain)
+        chars = np.empty((len(indices), s + v + w + 3), dtype=np.uint8)
+        chars[:, :s] = speakers[codes.speaker_code[indices]]
+        chars[:, s + 1 : s + v + 1] = videos[codes.video_code[indices]]
+        chars[:, [s, s + v + 1]] = ord("/")
+        chars[:, -1] = ord("\n")
+        utterance = codes.utterance[indices]
+        for digit in range(s + v + w + 1, s + v + 1, -1):
+            chars[:, digit] = utterance % 10 + ord("0")
+            utterance = utterance // 10
+
+        uri_offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        if np.all(speakers) and np.all(videos):
+            # no padding (e.g. VoxCeleb "id00012/21Uxsk56VDQ/00001" uris)
+            uri_offsets[1:] = np.arange(1, len(indices) + 1) * chars.shape[1]
+            return uri_offsets, chars.reshape(-1)
+        keep = chars != 0
+        np.cumsum(np.count_nonzero(keep, axis=1), out=uri_offsets[1:])
+        return uri_offsets, chars[keep]
+
+    def _uri_bytes(self):
+        """Get (uri_offsets, uri_data) of all files, without keeping them"""
+        if self._uri_data is None:
+            return self._assemble(np.arange(len(self)))
+        return self._uri_offsets, self._uri_data
+
+    def _decode_uris(self, start, end, chunk_size=65536):
+        """Decode uris of files `start` to `end` (excluded)"""
+        if start >= end:
+            return []
+        if self._uri_data is None:
+            # built chunk by chunk, so that bytes of all uris are never kept
+            uris = []
+            for chunk in range(start, end, chunk_size):
+                indices = np.arange(chunk, min(chunk + chunk_size, end))
+                _, data = self._assemble(indices)
+                uris.extend(data[:-1].tobytes().decode("utf-8").split("\n"))
+            return uris
+        offsets = self._uri_offsets
+        data = self._uri_data[offsets[start] : offsets[end] - 1]
+        return data.tobytes().decode("utf-8").split("\n")
+
+    def get_uri(self, i):
+        """Get uri of i-th file"""
+        if self._uri_data is None:
+            codes = self.codes()
+            if self._names is None:
+                self._names = (codes.speakers.tolist(), codes.videos.tolist())
+            speaker = self._names[0][codes.speaker_code[i]]
+            video = self._names[1][codes.video_code[i]]
+            return f"{speaker}/{video}/{codes.utterance[i]:0{self._width}d}"
+        start, end = self._uri_offsets[i], self._uri_offsets[i + 1] - 1
+        return self._uri_data[start:end].tobytes().decode("utf-8")
+
+    def get_speaker(self, i):
+        """Get speaker label of i-th file"""
+        if self._speaker is not None:
+            return str(self._speaker[i])
+        return self.get_uri(i).split("/")[0]
+
+    @property
+    def uris(self):
+        """List of all uris (decoded once, on first access)"""
+        if self._uris is None:
+            self._uris = self._decode_uris(0, len(self))
+        return self._uris
+
+    def iter_rows(self, chunk_size=65536):
+        """Iterate over (uri, duration, speaker) rows
+
+        Uris are decoded chunk by chunk (and not kept, unless `uris` was
+        already accessed), and files of the same speaker share the same
+        speaker label string.
+        """
+        index = self.speaker_index()
+        speakers = index.speakers.tolist()
+        for start in range(0, len(self), chunk_size):
+            end = min(start + chunk_size, len(self))
+            if self._uris is None:
+                uris = self._decode_uris(start, end)
+            else:
+                uris = self._uris[start:end]
+            durations = self.duration[start:end].tolist()
+            labels = index.labels[start:end].tolist()
+            for uri, duration, label in zip(uris, durations, labels):
+                yield uri, duration, speakers[label]
+
+    def _uri_field(self, start, end):
+        """Extract (fixed-width bytes) uri_data[start:end] of every file"""
+        return _fixed_width(self.uri_data, start, end)
+
+    def _first_component(self):
+        """Get offsets of the first "/" (or end) of every uri"""
+        start, end = self.uri_offsets[:-1], self.uri_offsets[1:] - 1
+        # sentinel slash past the end of data for uris without any
+        slashes = np.append(np.flatnonzero(self.uri_data == ord("/")), end[-1:])
+        return np.minimum(slashes[np.searchsorted(slashes, start)], end)
+
+    def codes(self):
+        """Integer-coded "{speaker}/{video}/{utterance}" uri components
+
+        Components are extracted from uri bytes without decoding them. Codes
+        are computed once, on first call, and kept for the lifetime of the
+        (cached) table. Compiled tables come with precomputed codes.
+
+        Returns
+        -------
+        codes : UriCodes or None
+            (speakers, speaker_code, videos, video_code, utterance) tuple,
+            where `speakers` and `videos` are sorted dictionaries, and
+            `speaker_code`, `video_code`, and `utterance` are (n_files, )
+            int32 arrays, such that the uri of i-th file is made of
+            `speakers[speaker_code[i]]`, `videos[video_code[i]]`, and
+            `utterance[i]`. None when any uri is not made of exactly three
+            "/"-separated components, the last one being a (non-empty)
+            number of at most 9 digits.
+        """
+        if self._codes is None:
+            self._codes = self._compute_codes() or False
+        return self._codes or None
+
+    def _compute_codes(self):
+        """Compute uri codes (None if uris do not follow the expected layout)"""
+        start, end = self.uri_offsets[:-1], self.uri_offsets[1:] - 1
+        slashes = np.flatnonzero(self.uri_data == ord("/"))
+        # every uri must contain exactly two slashes
+        if np.any(np.searchsorted(slashes, end) - np.searchsorted(slashes, start) != 2):
+            return None
+        first = slashes[np.searchsorted(slashes, start)]
+        second = slashes[np.searchsorted(slashes, first + 1)]
+        # utterance must be a (non-empty) number that fits in int32
+        length = end - second - 1
+        if np.any((length < 1) | (length > 9)):
+            return None
+        utterance = self._uri_field(second + 1, end)
+        chars = utterance.view(np.uint8).reshape(len(utterance), utterance.itemsize)
+        digits = (chars >= ord("0")) & (chars <= ord("9"))
+        if not np.all(digits | (np.arange(chars.shape[1]) >= length[:, None])):
+            return None
+        # uris are "{speaker}/{video}/{utterance:0{width}d}" when all
+        # utterances have the same number of digits
+        if len(length) > 0 and np.all(length == length[0]):
+            self._width = int(length[0])
+        speakers, speaker_code = np.unique(
+            self._uri_field(start, first), return_inverse=True
+        )
+        videos, video_code = np.unique(
+            self._uri_field(first + 1, second), return_inverse=True
+        )
+        return UriCodes(
+            _decode_fixed_width(speakers),
+            speaker_code.astype(np.int32),
+            _decode_fixed_width(videos),
+            video_code.astype(np.int32),
+            utterance.astype(np.int32),
+        )
+
+    def _fixed_width_uris(self):
+        """Get (fixed-width bytes) array of all uris"""
+        uri_offsets, uri_data = self._uri_bytes()
+        return _fixed_width(uri_data, uri_offsets[:-1], uri_offsets[1:] - 1)
+
+    @property
+    def uri(self):
+        """(n_files, ) array of uris"""
+        if self._uri is None:
+            self._uri = np.array(self.uris, dtype=object)
+        return self._uri
+
+    @property
+    def speaker(self):
+        """(n_files, ) array of speaker labels"""
+        if self._speaker is not None:
+            return self._speaker
+        index = self.speaker_index()
+        return index.speakers[index.labels]
+
+    def _require_codes(self, column):
+        codes = self.codes()
+        if codes is None:
+            raise ValueError(
+                f'Table has no "{column}" column: its uris do not follow the '
+                f'"{{speaker}}/{{video}}/{{utterance}}" layout.'
+            )
+        return codes
+
+    @property
+    def video(self):
+        """(n_files, ) array of YouTube video ids"""
+        codes = self._require_codes("video")
+        return codes.videos[codes.video_code]
+
+    @property
+    def utterance(self):
+        """(n_files, ) array of utterance indices"""
+        return self._require_codes("utterance").utterance
+
+    def speaker_index(self):
+        """Index files by speaker
+
+        The index is built once, on first call, and kept for the lifetime of
+        the (cached) table.
+
+        Returns
+        -------
+        index : SpeakerIndex
+        """
+        if self._speaker_index is None:
+            if self._speaker is not None:
+                speakers, labels = np.unique(self._speaker, return_inverse=True)
+            elif self.codes() is not None:
+                codes = self.codes()
+                speakers, labels = codes.speakers, codes.speaker_code
+            else:
+                # speaker is the first component of uris (see `get_speaker`)
+                start = self.uri_offsets[:-1]
+                speaker = self._uri_field(start, self._first_component())
+                speakers, labels = np.unique(speaker, return_inverse=True)
+                speakers = _decode_fixed_width(speakers)
+            self._speaker_index = SpeakerIndex(speakers, labels.astype(np.int32))
+        return self._speaker_index
+
+    def take(self, indices):
+        """Build new table made of selected files
+
+        Parameters
+        ----------
+        indices : (n_selected, ) array-like
+            Indices of selected files.
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        duration = self.duration[indices]
+        speaker = None if self._speaker is None else self._speaker[indices]
+
+        if self._uri_data is None:
+            # only keep speakers and videos of selected files in dictionaries
+            codes = self.codes()
+            speakers, speaker_code = np.unique(
+                codes.speaker_code[indices], return_inverse=True
+            )
+            videos, video_code = np.unique(
+                codes.video_code[indices], return_inverse=True
+            )
+            codes = UriCodes(
+                codes.speakers[speakers],
+                speaker_code.astype(np.int32),
+                codes.videos[videos],
+                video_code.astype(np.int32),
+                codes.utterance[indices],
+            )
+            return FileTable.from_codes(codes, self._width, duration, speaker=speaker)
+
+        # gather (newline-terminated) uri bytes of selected files, without
+        # decoding (and keeping) uris of this (possibly shared) table
+        start, end = self._uri_offsets[indices], self._uri_offsets[indices + 1]
+        uri_offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(end - start, out=uri_offsets[1:])
+        chars = _chars(self._uri_field(start, end))
+        uri_data = chars[np.arange(chars.shape[1]) < (end - start)[:, None]]
+        return FileTable(uri_offsets, uri_data, duration, speaker=speaker)
+
+    def rename_speakers(self, mapping):
+        """Build new table where speaker labels are renamed
+
+        Speakers are renamed once per speaker (not once per file), and the
+        speaker index of the new table is derived from the one of this table.
+
+        Parameters
+        ----------
+        mapping : dict
+            Mapping from current to new speaker labels.
+        """
+        index = self.speaker_index()
+        renamed = np.array([mapping[speaker] for speaker in index.speakers.tolist()])
+        speakers, inverse = np.unique(renamed.astype(str), return_inverse=True)
+        labels = inverse[index.labels].astype(np.int32)
+        table = FileTable(
+            self._uri_offsets, self._uri_data, self.duration, speaker=speakers[labels]
+        )
+        table._speaker_index = SpeakerIndex(speakers, labels)
+        # uris are unchanged
+        table._codes, table._width = self._codes, self._width
+        return table
+
+    def statistics(self):
+        """Summarize table
+
+        Returns
+        -------
+        statistics : TableStatistics
+            Number of files and speakers, total duration (in seconds), and
+            (n_speakers, ) array of total duration of each speaker of the
+            speaker index.
+        """
+        index = self.speaker_index()
+        speaker_duration = np.bincount(
+            index.labels, weights=self.duration, minlength=len(index)
+        )
+        return TableStatistics(
+            len(self), len(index), float(np.sum(speaker_duration)), speaker_duration
+        )
+
+    def shard(self, rank, world_size):
+        """Get one of `world_size` shards of similar total duration
+
+        See `shard_indices` for details.
+        """
+        check_shard(rank, world_size)
+        if world_size == 1:
+            return self
+        return self.take(shard_indices(self.duration, rank, world_size))
+
+    @classmethod
+    def concatenate(cls, tables):
+        """Concatenate multiple tables into one
+
+        Uri codes of tables are merged (rather than computed again).
+        """
+        speaker = None
+        if any(table._speaker is not None for table in tables):
+            speaker = np.concatenate([table.speaker for table in tables])
+        duration = np.concatenate([table.duration for table in tables])
+
+        codes = [table.codes() for table in tables]
+        if all(c is not None for c in codes):
+            speakers, speaker_code = _merge_codes(
+                [c.speakers for c in codes], [c.speaker_code for c in codes]
+            )
+            videos, video_code = _merge_codes(
+                [c.videos for c in codes], [c.video_code for c in codes]
+            )
+            utterance = np.concatenate(
+                [c.utterance for c in codes] + [np.zeros(0, dtype=np.int32)]
+            )
+            codes = UriCodes(speakers, speaker_code, videos, video_code, utterance)
+            widths = {table._width for table in tables}
+            if len(widths) == 1 and None not in widths:
+                return cls.from_codes(codes, widths.pop(), duration, speaker=speaker)
+        else:
+            codes = None
+
+        uri_offsets, uri_data = [np.zeros(1, dtype=np.int64)], []
+        for table in tables:
+            offsets, data = table._uri_bytes()
+            uri_offsets.append(offsets[1:] + uri_offsets[-1][-1])
+            uri_data.append(data)
+        union = cls(
+            np.concatenate(uri_offsets),
+            np.concatenate(uri_data + [np.zeros(0, dtype=np.uint8)]),
+            duration,
+            speaker=speaker,
+        )
+        union._codes = codes
+        return union
+
+    def to_arrays(self):
+        """Get table as a {name: np.ndarray} dictionary (see `from_arrays`)
+
+        Uri bytes are left out when uris can be rebuilt from their codes.
+        """
+        arrays = {"duration": self.duration}
+        codes = self.codes()
+        if codes is not None:
+            arrays.update(codes._asdict())
+        if codes is not None and self._width is not None:
+            arrays["utterance_width"] = np.array(self._width, dtype=np.int32)
+        else:
+            arrays["uri_offsets"] = self.uri_offsets
+            arrays["uri_data"] = self.uri_data
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Build table from a {name: np.ndarray} dictionary
+
+        Precomputed uri codes (see `codes`) are used when available.
+        """
+        codes = None
+        if all(field in arrays for field in UriCodes._fields):
+            codes = UriCodes(*(arrays[field] for field in UriCodes._fields))
+        if "uri_data" not in arrays:
+            width = int(arrays["utterance_width"])
+            return cls.from_codes(codes, width, arrays["duration"])
+        table = cls(arrays["uri_offsets"], arrays["uri_data"], arrays["duration"])
+        table._codes = codes
+        return table
+
+    @classmethod
+    def from_codes(cls, codes, width, duration, speaker=None):
+        """Build table from uri codes and array of durations
+
+        Parameters
+        ----------
+        codes : UriCodes
+            Uri codes (see `codes`).
+        width : int
+            Number of digits of (zero-padded) utterances, such that the uri
+            of i-th file is "{speaker}/{video}/{utterance:0{width}d}".
+        duration : (n_files, ) np.ndarray
+            Duration of each file.
+        speaker : (n_files, ) np.ndarray, optional
+            Speaker label of each file.
+        """
+        table = cls(None, None, duration, speaker=speaker)
+        table._codes, table._width = codes, width
+        return table
+
+    @classmethod
+    def from_uris(cls, uris, duration, speaker=None):
+        """Build table from list of uris and array of durations"""
+        uri_offsets, uri_data = encode_strings(uris)
+        duration = np.asarray(duration, dtype=np.float64)
+        return cls(uri_offsets, uri_data, duration, speaker=speaker)
+
+
+class SpeakerIndex:
+    """Index of the files of a table by speaker
+
+    Parameters
+    ----------
+    speakers : (n_speakers, ) np.ndarray
+        Sorted speaker labels. Speaker id `s` stands for `speakers[s]`.
+    labels : (n_files, ) np.ndarray
+        int32 array containing the speaker id of each file.
+
+    Attributes
+    ----------
+    order : (n_files, ) np.ndarray
+        Indices of files, sorted by speaker id (then by index).
+    offsets : (n_speakers + 1, ) np.ndarray
+        Files of speaker `s` are `order[offsets[s]:offsets[s + 1]]`.
+    counts : (n_speakers, ) np.ndarray
+        Number of files of each speaker.
+
+    Usage
+    -----
+    >>> index = protocol.train_speaker_index()
+    >>> s = index.speaker_id("id10001")
+    >>> offset, count = index.range(s)
+    >>> # draw k files of speaker s in O(k)
+    >>> files = index.order[offset + rng.integers(count, size=k)]
+    """
+
+    def __init__(self, speakers, labels):
+        self.speakers = speakers
+        self.labels = labels
+        self.counts = np.bincount(labels, minlength=len(speakers))
+        self.offsets = np.zeros(len(speakers) + 1, dtype=np.int64)
+        np.cumsum(self.counts, out=self.offsets[1:])
+        self.order = np.argsort(labels, kind="stable").astype(np.int32)
+
+    def __len__(self):
+        return len(self.speakers)
+
+    def speaker_id(self, speaker):
+        """Get speaker id(s) of speaker label(s)
+
+        Parameters
+        ----------
+        speaker : str or array-like of str
+            Speaker label(s).
+
+        Returns
+        -------
+        speaker_id : int or np.ndarray
+            Speaker id(s).
+        """
+        speaker = np.asarray(speaker)
+        s = np.searchsorted(self.speakers, speaker)
+        s = np.minimum(s, len(self.speakers) - 1)
+        if len(self.speakers) == 0 or np.any(self.speakers[s] != speaker):
+            raise KeyError(f"Unknown speaker: {speaker}.")
+        return int(s) if s.ndim == 0 else s.astype(np.int32)
+
+    def range(self, speaker_id):
+        """Get (offset, count) range of files of a speaker in `order`"""
+        return int(self.offsets[speaker_id]), int(self.counts[speaker_id])
+
+    def files(self, speaker_id):
+        """Get indices of files of a speaker"""
+        return self.order[self.offsets[speaker_id] : self.offsets[speaker_id + 1]]
+
+
+class TrialTable:
+    """Integer-encoded speaker verification trials
+
+    Parameters
+    ----------
+    files : FileTable
+        Table of (unique) files used in trials, sorted by uri.
+    pairs : (n_trials, 2) np.ndarray
+        int32 array of indices of (enrolment, test) files in `files`.
+    reference : (n_trials, ) np.ndarray
+        int8 array where 1 stands for target trials and 0 for non-target ones.
+
+    Usage
+    -----
+    Score all trials at once with a gather over an embedding matrix:
+
+    >>> trials = protocol.test_trial_table()
+    >>> embeddings = ...  # (len(trials.files), dimension) np.ndarray
+    >>> e1, e2 = embeddings[trials.pairs[:, 0]], embeddings[trials.pairs[:, 1]]
+    >>> scores = np.sum(e1 * e2, axis=1)
+    """
+
+    def __init__(self, files, pairs, reference):
+        self.files = files
+        self.pairs = pairs
+        self.reference = reference
+        self._manifest = None
+
+    def __len__(self):
+        return len(self.reference)
+
+    def take(self, indices):
+        """Build new trial table made of selected trials
+
+        Only files used in selected trials are kept in `files`.
+
+        Parameters
+        ----------
+        indices : (n_selected, ) array-like
+            Indices of selected trials.
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        used, pairs = np.unique(self.pairs[indices], return_inverse=True)
+        pairs = pairs.reshape(-1, 2).astype(np.int32)
+        return TrialTable(self.files.take(used), pairs, self.reference[indices])
+
+    def statistics(self):
+        """Summarize (unique) files used in trials
+
+        Returns
+        -------
+        statistics : TableStatistics
+            Number of trial files and speakers, total duration (in seconds)
+            of trial files, and (n_speakers, ) array of total duration of
+            each speaker. See `FileTable.statistics`.
+        """
+        return self.files.statistics()
+
+    def shard(self, rank, world_size):
+        """Get one of `world_size` shards of similar total duration
+
+        Trials sharing the same enrolment file always end up in the same
+        shard. See `shard_indices` for details.
+        """
+
+        check_shard(rank, world_size)
+        if world_size == 1:
+            return self
+
+        # split enrolment files according to the total duration of their trials
+        enrolment = self.pairs[:, 0]
+        duration = self.files.duration
+        weights = np.bincount(
+            enrolment,
+            weights=duration[enrolment] + duration[self.pairs[:, 1]],
+            minlength=len(self.files),
+        )
+        selected = np.zeros(len(self.files), dtype=bool)
+        selected[shard_indices(weights, rank, world_size)] = True
+
+        return self.take(np.flatnonzero(selected[enrolment]))
+
+    def groups(self):
+        """Iterate over trials grouped by enrolment file
+
+        Trials are expected to be sorted by enrolment file (which is the case
+        of trials returned by `load_trials`).
+
+        Yields
+        ------
+        index1 : int
+            Index of enrolment file in `files`.
+        indices2 : (n_trials_in_group, ) np.ndarray
+            Indices of test files in `files`.
+        reference : (n_trials_in_group, ) np.ndarray
+            Reference of each trial in the group.
+        """
+        enrolment = self.pairs[:, 0]
+        boundaries = np.flatnonzero(np.diff(enrolment)) + 1
+        starts = [0] + boundaries.tolist()
+        ends = boundaries.tolist() + [len(self)]
+        for start, end in zip(starts, ends):
+            if start == end:
+                continue
+            yield (
+                int(enrolment[start]),
+                self.pairs[start:end, 1],
+                self.reference[start:end],
+            )
+
+    def manifest(self):
+        """Unique trial files, sorted by duration
+
+        Extracting embeddings from files sorted by duration minimizes
+        padding when they are batched together.
+
+        Returns
+        -------
+        files : FileTable
+            Table of unique files used in trials, sorted by duration.
+        index : (n_files, ) np.ndarray
+            `files[i]` is `self.files[index[i]]`, i.e. the file referred
+            to as `index[i]` in `self.pairs`.
+
+        Usage
+        -----
+        >>> files, index = trials.manifest()
+        >>> embeddings = np.empty((len(files), dimension))
+        >>> embeddings[index] = ...  # embeddings extracted in `files` order
+        """
+        if self._manifest is None:
+            index = np.argsort(self.files.duration, kind="stable").astype(np.int32)
+            self._manifest = (self.files.take(index), index)
+        return self._manifest
+
+
+def _sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _compile(name, sources, build, cache_dir=None):
+    """Compile arrays into cache directory
+
+    Parameters
+    ----------
+    name : str
+        Table name.
+    sources : list of Path
+        Files the table is built from.
+    build : callable
+        Returns the table as a {name: np.ndarray} dictionary.
+    cache_dir : Path, optional
+        Defaults to `get_cache_dir()`.
+
+    Returns
+    -------
+    compiled : Path
+        Path to the directory containing compiled arrays.
+    """
+
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    cache_dir = Path(cache_dir)
+
+    with timer.stage("tables.hash", label=name):
+        digest = "".join(_sha256(source) for source in sources)
+        if len(sources) > 1:
+            digest = hashlib.sha256(digest.encode("ascii")).hexdigest()
+    compiled = cache_dir / f"{name}-{digest[:16]}"
+    if compiled.is_dir():
+        return compiled
+
+    arrays = build()
+
+    # write into a temporary directory that is atomically renamed
+    # so that concurrent workers never see a partially written table
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{name}-", dir=cache_dir))
+    try:
+        with timer.stage("tables.save", label=name):
+            for array, value in arrays.items():
+                np.save(tmp / f"{array}.npy", value)
+            os.replace(tmp, compiled)
+    except OSError:
+        # another process won the race
+        if not compiled.is_dir():
+            raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return compiled
+
+
+def _load_compiled(name, sources, build):
+    """Load memory-mapped compiled arrays (compiling them if needed)
+
+    Falls back to `build()` when the cache directory is not writable.
+    """
+
+    try:
+        compiled = _compile(name, sources, build)
+    except OSError:
+        return build()
+
+    with timer.stage("tables.load", label=name):
+        return {
+            path.stem: np.load(path, mmap_mode="r") for path in compiled.glob("*.npy")
+        }
+
+
+def _read_durations(path):
+    """Parse (gzipped) "{uri} {duration}" text file"""
+    with timer.stage("durations.parse", label=Path(path).name) as stage:
+        durations = FileTable(*read_durations(path))
+        stage.rows = len(durations)
+    return durations
+
+
+def _durations_source(name):
+    for data_dir in get_data_dirs():
+        path = data_dir / f"{name}_duration.txt.gz"
+        if path.is_file():
+            return path
+    return DATA_DIR / f"{name}_duration.txt.gz"
+
+
+def _build_durations(path):
+    return _read_durations(path).to_arrays()
+
+
+def compile_durations(path, cache_dir=None):
+    """Compile duration table into memory-mappable arrays
+
+    Parameters
+    ----------
+    path : Path
+        Path to "{uri} {duration}" text file (possibly gzipped).
+    cache_dir : Path, optional
+        Defaults to `get_cache_dir()`.
+
+    Returns
+    -------
+    compiled : Path
+        Path to the directory containing compiled arrays.
+    """
+    path = Path(path)
+    name = path.name.split(".")[0]
+    return _compile(name, [path], lambda: _build_durations(path), cache_dir=cache_dir)
+
+
+def _load_compiled_durations(name):
+    path = _durations_source(name)
+    arrays = _load_compiled(f"{name}_duration", [path], lambda: _build_durations(path))
+    return FileTable.from_arrays(arrays)
+
+
+def load_durations(*names):
+    """Load (compiled) duration tables
+
+    Tables are memoized in `cache`.
+
+    Parameters
+    ----------
+    names : str
+        Table name (e.g. "vox1_dev" for "data/vox1_dev_duration.txt.gz").
+        When more than one name is provided, tables are concatenated and
+        their union is compiled, with a global speaker encoding (i.e. its
+        `speaker_index()` comes for free).
+
+    Returns
+    -------
+    durations : FileTable
+        Memory-mapped file table. Falls back to parsing the text file
+        when the cache directory is not writable.
+    """
+
+    if len(names) == 1:
+        (name,) = names
+        return cache.get(("durations", name), lambda: _load_compiled_durations(name))
+
+    return cache.get(("durations",) + names, lambda: _load_compiled_union(names))
+
+
+def _union_name(names):
+    return "+".join(names) + "_duration"
+
+
+def _build_union(names):
+    tables = [load_durations(name) for name in names]
+    return FileTable.concatenate(tables).to_arrays()
+
+
+def _load_compiled_union(names):
+    sources = [_durations_source(name) for name in names]
+    arrays = _load_compiled(_union_name(names), sources, lambda: _build_union(names))
+    return FileTable.from_arrays(arrays)
+
+
+def compile_union(names, cache_dir=None):
+    """Compile union of duration tables into memory-mappable arrays
+
+    The union is compiled along with its (global) uri codes, so that
+    loading it neither concatenates nor indexes its tables again.
+
+    Parameters
+    ----------
+    names : list of str
+        Table names (e.g. ["vox1_xtrn", "vox2_dev"]).
+    cache_dir : Path, optional
+        Defaults to `get_cache_dir()`.
+
+    Returns
+    -------
+    compiled : Path
+        Path to the directory containing compiled arrays.
+    """
+    names = tuple(names)
+    sources = [_durations_source(name) for name in names]
+    return _compile(
+        _union_name(names), sources, lambda: _build_union(names), cache_dir=cache_dir
+    )
+
+
+def _strip_extension(names, length=4):
+    """Strip (`length`-long) extension of fixed-width bytes file names"""
+    width = names.dtype.itemsize
+    chars = np.ascontiguousarray(names).view(np.uint8).reshape(names.shape + (width,))
+    lengths = np.char.str_len(names)
+    chars = np.where(np.arange(width) < (lengths - length)[..., None], chars, 0)
+    return chars.astype(np.uint8).view(f"S{width}")[..., 0]
+
+
+def _read_trials(path, durations):
+    """Parse (gzipped) "{reference} {file1} {file2}" text file
+
+    Trials are sorted by `file1` and joined with `durations`.
+    """
+
+    label = Path(path).name
+
+    with timer.stage("trials.parse", label=label) as stage:
+        reference, file1, file2 = read_trials(path)
+        stage.rows = len(reference)
+
+    # same (quicksort) order as pandas' sort_values("file1") used to give
+    with timer.stage("trials.sort", label=label) as stage:
+        order = np.argsort(file1, kind="quicksort")
+        reference, file1, file2 = reference[order], file1[order], file2[order]
+        stage.rows = len(reference)
+
+    with timer.stage("trials.encode", label=label) as stage:
+        # strip extension and encode files as indices into the table of
+        # unique files
+        uris = _strip_extension(np.stack([file1, file2], axis=1))
+        unique, pairs = np.unique(uris, return_inverse=True)
+        pairs = pairs.reshape(-1, 2).astype(np.int32)
+        stage.rows = len(pairs)
+
+    # join unique files with durations
+    with timer.stage("trials.join", label=label) as stage:
+        known = durations._fixed_width_uris()
+        order = np.argsort(known, kind="stable")
+        position = np.searchsorted(known[order], unique)
+        position = np.minimum(position, max(len(known) - 1, 0))
+        found = np.zeros(len(unique), dtype=bool)
+        if len(known) > 0:
+            found = known[order[position]] == unique
+        if not np.all(found):
+            uri = unique[np.argmin(found)].decode("utf-8")
+            raise KeyError(f"Could not find duration of {uri}.")
+        files = FileTable.from_uris(
+            unique.tolist(), durations.duration[order[position]]
+        )
+        stage.rows = len(files)
+
+    return TrialTable(files, pairs, reference)
+
+
+def _trials_sources(protocol):
+    # trials may use any VoxCeleb1 file (dev AND tst)
+    return [
+        DATA_DIR / f"verif_{protocol}.txt.gz",
+        _durations_source("vox1_dev"),
+        _durations_source("vox1_tst"),
+    ]
+
+
+def _build_trials(protocol):
+    path = DATA_DIR / f"verif_{protocol}.txt.gz"
+    trials = _read_trials(path, load_durations("vox1_dev", "vox1_tst"))
+    return {
+        "pairs": trials.pairs,
+        "reference": trials.reference,
+        **trials.files.to_arrays(),
+    }
+
+
+def compile_trials(protocol, cache_dir=None):
+    """Compile trial table into memory-mappable arrays
+
+    Parameters
+    ----------
+    protocol : str
+        Trial list name (e.g. "original" for "data/verif_original.txt.gz").
+    cache_dir : Path, optional
+        Defaults to `get_cache_dir()`.
+
+    Returns
+    -------
+    compiled : Path
+        Path to the directory containing compiled arrays.
+    """
+    return _compile(
+        f"verif_{protocol}",
+        _trials_sources(protocol),
+        lambda: _build_trials(protocol),
+        cache_dir=cache_dir,
+    )
+
+
+def _load_compiled_trials(protocol):
+    arrays = _load_compiled(
+        f"verif_{protocol}",
+        _trials_sources(protocol),
+        lambda: _build_trials(protocol),
+    )
+    pairs = arrays.pop("pairs")
+    reference = arrays.pop("reference")
+    return TrialTable(FileTable.from_arrays(arrays), pairs, reference)
+
+
+def load_trials(protocol):
+    """Load (compiled) trials
+
+    Trials are memoized in `cache`.
+
+    Parameters
+    ----------
+    protocol : str
+        Trial list name (e.g. "original" for "data/verif_original.txt.gz").
+
+    Returns
+    -------
+    trials : TrialTable
+        Trials sorted by enrolment file.
+    """
+    return cache.get(("trials", protocol), lambda: _load_compiled_trials(protocol))
+
+
+def _search(keys, queries):
+    """Find `queries` in sorted `keys` array
+
+    Raises KeyError when any of `queries` is missing from `keys`.
+    """
+    queries = np.asarray(queries, dtype=str)
+    positions = np.minimum(np.searchsorted(keys, queries), max(len(keys) - 1, 0))
+    if len(keys) == 0 or np.any(keys[positions] != queries):
+        raise KeyError(f"Unknown speaker: {queries}.")
+    return positions
+
+
+class Identities(Mapping):
+    """Bidirectional mapping between speaker ids and speaker names
+
+    Parameters
+    ----------
+    ids : (n_speakers, ) np.ndarray
+        Sorted speaker ids (e.g. "id10001").
+    names : (n_speakers, ) np.ndarray
+        Name of each speaker (e.g. "A.J._Buckley").
+
+    Usage
+    -----
+    >>> identities = load_identities()
+    >>> identities["id10001"]                        # 'A.J._Buckley'
+    >>> identities.name_of(["id10001", "id10002"])   # array of names
+    >>> identities.id_of(["A.J._Buckley"])           # array of ids
+
+    Both lookups are vectorized binary searches, so that whole columns
+    (e.g. `table.speaker`) can be mapped at once.
+    """
+
+    def __init__(self, ids, names):
+        self.ids = ids
+        self.names = names
+        self._by_name = np.argsort(names, kind="stable")
+
+    def __getitem__(self, speaker_id):
+        if not isinstance(speaker_id, str):
+            raise KeyError(speaker_id)
+        return str(self.name_of(speaker_id))
+
+    def __iter__(self):
+        return iter(self.ids.tolist())
+
+    def __len__(self):
+        return len(self.ids)
+
+    def name_of(self, ids):
+        """Get name(s) of speaker id(s)
+
+        Raises KeyError when any of `ids` is unknown.
+        """
+        return self.names[_search(self.ids, ids)]
+
+    def id_of(self, names):
+        """Get speaker id(s) of speaker name(s)
+
+        Raises KeyError when any of `names` is unknown.
+        """
+        return self.ids[self._by_name[_search(self.names[self._by_name], names)]]
+
+
+def _read_identities(path):
+    """Parse (gzipped) "{speaker_id} {speaker_name}" text file"""
+    with timer.stage("identities.parse", label=Path(path).name) as stage:
+        ids, names = zip(*sorted(read_identities(path).items()))
+        identities = Identities(np.array(ids, dtype=str), np.array(names, dtype=str))
+        stage.rows = len(identities)
+    return identities
+
+
+def load_identities():
+    """Load VoxCeleb1 identities
+
+    Identities are memoized in `cache`.
+
+    Returns
+    -------
+    identities : Identities
+        Mapping from VoxCeleb1 speaker id (e.g. "id10001") to actual speaker
+        name (e.g. "A.J._Buckley"), with vectorized lookups in both ways.
+    """
+
+    return cache.get(
+        ("identities",), lambda: _read_identities(DATA_DIR / "vox1_identities.txt.gz")
+    )
+
+
+def load_identified_durations(name):
+    """Load (compiled) duration table with speaker ids replaced by names
+
+    Speakers are renamed once and the resulting table is memoized in `cache`.
+
+    Parameters
+    ----------
+    name : str
+        VoxCeleb1 table name (e.g. "vox1_dev").
+
+    Returns
+    -------
+    durations : FileTable
+        File table whose "speaker" column contains actual speaker names.
+    """
+    return cache.get(
+        ("identified_durations", name),
+        lambda: load_durations(name).rename_speakers(load_identities()),
+    )
+
+
+class SpeakerMetadata:
+    """Typed speaker metadata index
+
+    Parameters
+    ----------
+    speaker : (n_speakers, ) np.ndarray
+        Sorted VoxCeleb speaker ids (e.g. "id00012").
+    vggface2 : (n_speakers, ) np.ndarray
+        VGGFace2 identity (e.g. "n000012").
+    gender : (n_speakers, ) np.ndarray
+        Gender ("m" or "f").
+    subset : (n_speakers, ) np.ndarray
+        Official VoxCeleb subset ("dev" or "test").
+
+    Usage
+    -----
+    >>> metadata = load_metadata()
+    >>> index = protocol.train_speaker_index()
+    >>> female = metadata.mask(index.speakers, gender="f")  # (n_speakers, )
+    >>> files = index.order[female[index.labels[index.order]]]
+
+    Speakers are looked up by binary search, so that all methods are
+    vectorized over arrays of speakers. Speakers that are missing from
+    metadata (e.g. VoxCeleb 1 speakers) have empty gender and subset.
+    """
+
+    def __init__(self, speaker, vggface2, gender, subset):
+        self.speaker = speaker
+        self.vggface2 = vggface2
+        self.gender = gender
+        self.subset = subset
+
+    def __len__(self):
+        return len(self.speaker)
+
+    def lookup(self, speakers):
+        """Get position of speakers in metadata
+
+        Parameters
+        ----------
+        speakers : (n, ) array-like of str
+            Speaker ids.
+
+        Returns
+        -------
+        positions : (n, ) np.ndarray
+            Position of each speaker in metadata (-1 when missing).
+        """
+        speakers = np.asarray(speakers, dtype=str)
+        if len(self) == 0:
+            return np.full(speakers.shape, -1, dtype=np.int64)
+        positions = np.searchsorted(self.speaker, speakers)
+        positions = np.minimum(positions, len(self) - 1)
+        return np.where(self.speaker[positions] == speakers, positions, -1)
+
+    def _column(self, column, speakers):
+        positions = self.lookup(speakers)
+        return np.where(positions < 0, "", column[positions])
+
+    def gender_of(self, speakers):
+        """Get (n, ) array of genders of (n, ) array of speakers"""
+        return self._column(self.gender, speakers)
+
+    def subset_of(self, speakers):
+        """Get (n, ) array of official subsets of (n, ) array of speakers"""
+        return self._column(self.subset, speakers)
+
+    def mask(self, speakers, gender=None, subset=None):
+        """Select speakers based on their metadata
+
+        Parameters
+        ----------
+        speakers : (n, ) array-like of str
+            Speaker ids.
+        gender : {"m", "f"}, optional
+            Only select speakers with this gender.
+        subset : {"dev", "test"}, optional
+            Only select speakers from this official subset.
+
+        Returns
+        -------
+        mask : (n, ) np.ndarray
+            Boolean mask of selected speakers.
+        """
+        positions = self.lookup(speakers)
+        mask = positions >= 0
+        if gender is not None:
+            mask &= self.gender[positions] == gender
+        if subset is not None:
+            mask &= self.subset[positions] == subset
+        return mask
+
+    def select_files(self, table, gender=None, subset=None):
+        """Select files of a table based on the metadata of their speaker
+
+        Parameters
+        ----------
+        table : FileTable
+            Files.
+        gender, subset : str, optional
+            See `mask`.
+
+        Returns
+        -------
+        selected : FileTable
+            Selected files.
+        """
+        index = table.speaker_index()
+        mask = self.mask(index.speakers, gender=gender, subset=subset)
+        return table.take(np.flatnonzero(mask[index.labels]))
+
+    def select_trials(self, trials, gender=None, same_gender=False):
+        """Select trials based on the gender of their speakers
+
+        Parameters
+        ----------
+        trials : TrialTable
+            Trials.
+        gender : {"m", "f"}, optional
+            Only select trials where both speakers have this gender.
+        same_gender : bool, optional
+            Only select trials where both speakers have the same (known)
+            gender.
+
+        Returns
+        -------
+        selected : TrialTable
+            Selected trials.
+        """
+        index = trials.files.speaker_index()
+        genders = self.gender_of(index.speakers)[index.labels]
+        gender1, gender2 = genders[trials.pairs[:, 0]], genders[trials.pairs[:, 1]]
+        mask = np.ones(len(trials), dtype=bool)
+        if gender is not None:
+            mask &= (gender1 == gender) & (gender2 == gender)
+        if same_gender:
+            mask &= (gender1 == gender2) & (gender1 != "")
+        return trials.take(np.flatnonzero(mask))
+
+
+def _read_metadata(path):
+    """Parse (gzipped) "VoxCeleb2 ID, VGGFace2 ID, Gender, Set" CSV file"""
+    with timer.stage("metadata.parse", label=Path(path).name) as stage:
+        columns = read_csv(path)
+        speaker = np.array(columns["VoxCeleb2 ID"], dtype=str)
+        order = np.argsort(speaker, kind="stable")
+        metadata = SpeakerMetadata(
+            speaker[order],
+            np.array(columns["VGGFace2 ID"], dtype=str)[order],
+            np.array(columns["Gender"], dtype=str)[order],
+            np.array(columns["Set"], dtype=str)[order],
+        )
+        stage.rows = len(metadata)
+    return metadata
+
+
+def load_metadata():
+    """Load VoxCeleb2 speakers metadata
+
+    Metadata is memoized in `cache`.
+
+    Returns
+    -------
+    metadata : SpeakerMetadata
+        Gender, official subset, and VGGFace2 identity of VoxCeleb2 speakers.
+    """
+    return cache.get(
+        ("metadata",), lambda: _read_metadata(DATA_DIR / "vox2_meta.csv.gz")
+    )
+
+
+# unions of tables used by protocols (e.g. VoxCeleb_X)
+UNIONS = [("vox1_xtrn", "vox2_dev")]
+
+
+def compile_tables():
+    """Compile all duration and trial tables
+
+    This includes duration tables found in `PYANNOTE_VOXCELEB_DATA`, and
+    the unions of tables used by protocols (see `UNIONS`).
+
+    Returns
+    -------
+    compiled : list of Path
+        Paths to the directories containing compiled arrays.
+    """
+    names = {
+        path.name[: -len("_duration.txt.gz")]
+        for data_dir in get_data_dirs()
+        for path in data_dir.glob("*_duration.txt.gz")
+    }
+    compiled = [compile_durations(_durations_source(name)) for name in sorted(names)]
+    for union in UNIONS:
+        if all(name in names for name in union):
+            compiled.append(compile_union(union))
+    for path in sorted(DATA_DIR.glob("verif_*.txt.gz")):
+        compiled.append(compile_trials(path.name[len("verif_") : -len(".txt.gz")]))
+    return compiled
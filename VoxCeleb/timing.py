@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+"""Opt-in stage-level timing of table loading and iteration
+
+Timing is disabled by default, in which case instrumented code only pays for
+an attribute lookup per stage (and nothing per item). Once enabled, `timer`
+accumulates the number of calls, rows, and seconds spent in each stage, and
+reports every stage to optional callbacks:
+
+    >>> from VoxCeleb.timing import timer
+    >>> with timer.recording(callback=print):
+    ...     trials = list(protocol.test_trial())
+    Event(stage='trials.parse', label='verif_original.txt.gz', rows=37720, seconds=0.03)
+    ...
+    >>> timer.info()
+    {'trials.parse': StageInfo(calls=1, rows=37720, seconds=0.03), ...}
+
+Setting the `PYANNOTE_VOXCELEB_TIMING` environment variable enables timing
+at import time, with every stage logged to the "VoxCeleb.timing" logger.
+
+Stages are:
+
+    decompress              reading (and decompressing) bundled text files
+    {table}.parse           parsing "durations", "trials", "identities",
+                            or "metadata" tables
+    trials.sort             sorting trials by enrolment file
+    trials.encode           encoding trials as pairs of unique files indices
+    trials.join             joining unique trial files with durations
+    tables.hash             hashing source files of compiled tables
+    tables.save             saving compiled tables into the cache directory
+    tables.load             memory-mapping compiled tables
+    files.iterate           building files (rows are files)
+    trials.iterate          building trials (rows are trials)
+    trial_groups.iterate    building groups of trials (rows are groups)
+
+Stages may be nested (e.g. "decompress" happens within "{table}.parse", and
+tables are loaded when the first file is built), so their durations should
+not be summed. Iteration stages only account for the time spent producing
+items, not for the time spent by the caller consuming them.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+Event = namedtuple("Event", ["stage", "label", "rows", "seconds"])
+
+StageInfo = namedtuple("StageInfo", ["calls", "rows", "seconds"])
+
+logger = logging.getLogger(__name__)
+
+
+def log(event):
+    """Log stage to "VoxCeleb.timing" logger"""
+    if event.rows is None:
+        logger.info("%s (%s): %.6fs", event.stage, event.label, event.seconds)
+    else:
+        logger.info(
+            "%s (%s): %.6fs, %d rows",
+            event.stage,
+            event.label,
+            event.seconds,
+            event.rows,
+        )
+
+
+class _Stage:
+    """Context manager timing a stage"""
+
+    __slots__ = ("timer", "name", "label", "rows", "start")
+
+    def __init__(self, timer, name, label):
+        self.timer = timer
+        self.name = name
+        self.label = label
+        self.rows = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self.start
+        self.timer.record(self.name, seconds, rows=self.rows, label=self.label)
+
+
+class _NullStage:
+    """Context manager used for stages when timing is disabled"""
+
+    __slots__ = ("rows",)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Timer:
+    """Thread-safe stage-level timer
+
+    Usage
+    -----
+    >>> with timer.stage("trials.parse", label="verif_x") as stage:
+    ...     trials = parse(...)
+    ...     stage.rows = len(trials)
+    >>> for item in timer.iterate("files.iterate", items):
+    ...     pass
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.callbacks = []
+        self._counters = dict()
+        self._lock = threading.Lock()
+
+    def enable(self, callback=None):
+        """Enable timing
+
+        Parameters
+        ----------
+        callback : callable, optional
+            Called with an `Event` at the end of every stage.
+        """
+        with self._lock:
+            if callback is not None:
+                self.callbacks.append(callback)
+            self.enabled = True
+
+    def disable(self):
+        """Disable timing (and remove callbacks). Counters are kept."""
+        with self._lock:
+            self.enabled = False
+            self.callbacks = []
+
+    @contextmanager
+    def recording(self, callback=None):
+        """Enable timing within a `with` block
+
+        See `enable` for the description of parameters.
+        """
+        enabled, callbacks = self.enabled, list(self.callbacks)
+        self.enable(callback=callback)
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self.enabled, self.callbacks = enabled, callbacks
+
+    def stage(self, name, label=None):
+        """Time a stage
+
+        Parameters
+        ----------
+        name : str
+            Stage name.
+        label : str, optional
+            What the stage is applied to (e.g. table name).
+
+        Returns
+        -------
+        stage : context manager
+            Its `rows` attribute can be set to the number of processed rows.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, label)
+
+    def iterate(self, name, items, label=None):
+        """Time the production of items
+
+        Parameters
+        ----------
+        name : str
+            Stage name.
+        items : iterable
+            Items.
+        label : str, optional
+            What the stage is applied to (e.g. subset name).
+
+        Returns
+        -------
+        items : iterable
+            Same items. When timing is disabled, `items` itself is returned.
+        """
+        if not self.enabled:
+            return items
+        return self._iterate(name, items, label)
+
+    def _iterate(self, name, items, label):
+
+        items = iter(items)
+        rows, seconds = 0, 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                finally:
+                    seconds += time.perf_counter() - start
+                rows += 1
+                yield item
+        finally:
+            self.record(name, seconds, rows=rows, label=label)
+
+    def record(self, name, seconds, rows=None, label=None):
+        """Record a stage that was timed externally"""
+        with self._lock:
+            calls, total_rows, total_seconds = self._counters.get(
+                name, StageInfo(0, 0, 0.0)
+            )
+            self._counters[name] = StageInfo(
+                calls + 1, total_rows + (rows or 0), total_seconds + seconds
+            )
+            callbacks = list(self.callbacks)
+
+        event = Event(name, label, rows, seconds)
+        for callback in callbacks:
+            callback(event)
+
+    def info(self):
+        """Report cumulative counters
+
+        Returns
+        -------
+        counters : dict
+            {stage: StageInfo(calls, rows, seconds)} dictionary.
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self):
+        """Reset cumulative counters"""
+        with self._lock:
+            self._counters.clear()
+
+
+timer = Timer()
+
+if os.environ.get("PYANNOTE_VOXCELEB_TIMING"):
+    timer.enable(callback=log)
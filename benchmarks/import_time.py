@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+"""Check that `import VoxCeleb` stays within its import-time budget
+
+VoxCeleb is imported through the "pyannote.database.databases" entry point
+by every tool that lists protocols, at which point pyannote.database (and
+therefore pandas, numpy, and pyannote.core) is already imported. What is
+measured here is the extra cost of importing VoxCeleb on top of it, as
+reported by `python -X importtime`, in fresh interpreters.
+
+Usage: python benchmarks/import_time.py [--budget MS] [--repeat N]
+
+Exits with a non-zero status when the median import time exceeds the budget
+or when modules that are meant to be deferred are imported.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+# import-time budget, in milliseconds
+BUDGET = 5.0
+
+# modules that should only be imported once files or trials are requested
+DEFERRED = ["VoxCeleb._version", "VoxCeleb.parsers", "VoxCeleb.tables"]
+
+SCRIPT = f"""
+import pyannote.database
+import sys
+import VoxCeleb
+print(*[module for module in {DEFERRED!r} if module in sys.modules])
+"""
+
+
+def measure():
+    """Import VoxCeleb in a fresh interpreter
+
+    Returns
+    -------
+    duration : float
+        Cumulative import time of VoxCeleb, in milliseconds.
+    imported : list of str
+        Deferred modules that were imported nonetheless.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, package = line.split("|")
+        if package.rstrip() == " VoxCeleb":
+            duration = int(cumulative) / 1000.0
+            break
+    else:
+        raise RuntimeError("Could not find VoxCeleb in import time report.")
+    return duration, process.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--budget", type=float, default=BUDGET, help="in ms")
+    parser.add_argument("--repeat", type=int, default=11)
+    args = parser.parse_args()
+
+    # first run warms up bytecode and filesystem caches
+    measure()
+    durations, imported = [], set()
+    for _ in range(args.repeat):
+        duration, deferred = measure()
+        durations.append(duration)
+        imported.update(deferred)
+
+    median = statistics.median(durations)
+    print(
+        f"import VoxCeleb: {median:.2f}ms (median of {args.repeat}, "
+        f"min {min(durations):.2f}ms, budget {args.budget:.2f}ms)"
+    )
+
+    failed = False
+    if median > args.budget:
+        print("FAILED: import time exceeds budget.")
+        failed = True
+    if imported:
+        print(f"FAILED: deferred modules were imported: {', '.join(sorted(imported))}")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
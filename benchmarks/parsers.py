@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+"""Benchmark parsing of bundled tables
+
+For each table shipped in `data/`, compare `VoxCeleb.parsers` with
+pandas (when it is installed) and measure:
+
+- parse time (best of `--repeat` runs);
+- peak tracemalloc allocations (in a separate run, as tracemalloc slows
+  parsing down).
+
+Note that tracemalloc only sees the allocations that go through Python
+allocators, which most of pandas' C-level allocations (e.g. its tokenizer
+buffers) do not, so pandas peaks are understated.
+
+Usage: python benchmarks/parsers.py [--output results.json]
+                                    [--table NAME ...]
+                                    [--repeat NUM_RUNS]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from protocols import environment  # noqa: E402
+
+# table name: (VoxCeleb.parsers function, pandas column names)
+TABLES = {
+    "vox1_dev_duration.txt.gz": ("read_durations", ["uri", "duration"]),
+    "vox1_tst_duration.txt.gz": ("read_durations", ["uri", "duration"]),
+    "vox2_tst_duration.txt.gz": ("read_durations", ["uri", "duration"]),
+    "verif_original.txt.gz": ("read_trials", ["reference", "file1", "file2"]),
+    "verif_x.txt.gz": ("read_trials", ["reference", "file1", "file2"]),
+    "vox1_identities.txt.gz": ("read_identities", ["speaker", "name"]),
+}
+
+
+def get_parsers(names):
+    """Get {"parsers": function, "pandas": function} parsers of a table"""
+
+    from VoxCeleb import parsers
+
+    functions = {"parsers": getattr(parsers, names[0])}
+
+    try:
+        import pandas as pd
+    except ImportError:
+        return functions
+
+    def read_table(path):
+        return pd.read_table(path, delim_whitespace=True, names=names[1])
+
+    functions["pandas"] = read_table
+    return functions
+
+
+def measure(parse, path, repeat):
+    """Measure parse time and peak allocations"""
+
+    seconds = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        parse(path)
+        seconds.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    parse(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": min(seconds), "tracemalloc_peak": peak}
+
+
+def main():
+
+    from VoxCeleb.tables import DATA_DIR
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--table", nargs="+", default=list(TABLES))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    for table in args.table:
+        path = DATA_DIR / table
+        for implementation, parse in get_parsers(TABLES[table]).items():
+            result = {"table": table, "implementation": implementation}
+            result.update(measure(parse, path, args.repeat))
+            results.append(result)
+            print(
+                f"{table:28s} {implementation:8s} "
+                f"{1000 * result['seconds']:8.1f}ms  "
+                f"traced peak {result['tracemalloc_peak'] / 2**20:6.1f}MB",
+                file=sys.stderr,
+            )
+
+    output = json.dumps({"environment": environment(), "results": results}, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
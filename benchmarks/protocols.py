@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+"""Benchmark iteration over VoxCeleb protocols
+
+For each protocol, and each of its file and trial iterators, measure:
+
+- time to first item and items per second;
+- peak resident set size (RSS), and its increase during iteration;
+- peak and remaining tracemalloc allocations during iteration;
+
+with both a cold cache (tables are compiled from the bundled `data/` files)
+and a warm cache (tables were compiled ahead of time with `python -m
+VoxCeleb`). Every measurement runs in a fresh interpreter, so that the
+in-process table cache is always empty and RSS peaks are not shared.
+tracemalloc slows iteration down noticeably and is therefore enabled in
+a separate run from the one that is timed.
+
+Only bundled files are used: no audio, network, or database.yml needed.
+
+Usage: python benchmarks/protocols.py [--output results.json]
+                                      [--protocol NAME ...]
+                                      [--iterator NAME ...]
+                                      [--cache {cold,warm} ...]
+                                      [--no-tracemalloc]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+PROTOCOLS = ["Debug", "VoxCeleb1", "VoxCeleb1_TrueID", "VoxCeleb1_X"]
+PROTOCOLS += ["VoxCeleb2", "VoxCeleb_X"]
+
+ITERATORS = ["train", "development", "test"]
+ITERATORS += ["development_trial", "test_trial"]
+
+CACHES = ["cold", "warm"]
+
+
+def max_rss():
+    """Peak resident set size of current process, in bytes"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, and in kilobytes elsewhere
+    return rss if sys.platform == "darwin" else 1024 * rss
+
+
+def run(protocol, iterator, trace=False):
+    """Iterate over `protocol`.`iterator`() once (in current process)
+
+    Returns
+    -------
+    result : dict
+        Measurements.
+    """
+
+    import tracemalloc
+    import VoxCeleb
+
+    result = {"protocol": protocol, "iterator": iterator}
+    rss = max_rss()
+
+    if trace:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    items = getattr(getattr(VoxCeleb, protocol)(), iterator)()
+
+    try:
+        next(items)
+    except StopIteration:
+        num_items, first = 0, time.perf_counter()
+    except NotImplementedError:
+        result["status"] = "unavailable"
+        return result
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+    else:
+        first = time.perf_counter()
+        num_items = 1 + sum(1 for _ in items)
+    end = time.perf_counter()
+
+    result["status"] = "ok"
+    result["num_items"] = num_items
+    result["first_item"] = first - start
+    result["total"] = end - start
+    result["items_per_second"] = num_items / (end - start)
+    result["max_rss"] = max_rss()
+    result["rss_increase"] = result["max_rss"] - rss
+
+    if trace:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["tracemalloc_peak"] = peak
+        result["tracemalloc_current"] = current
+
+    return result
+
+
+def spawn(protocol, iterator, cache_dir, trace=False):
+    """Same as `run` in a fresh interpreter using `cache_dir` as cache"""
+    env = dict(os.environ, PYANNOTE_VOXCELEB_CACHE=cache_dir)
+    command = [sys.executable, __file__, "--run", protocol, iterator]
+    if trace:
+        command.append("--trace")
+    process = subprocess.run(
+        command, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(process.stdout)
+
+
+def compile_tables(cache_dir):
+    """Compile tables ahead of time in `cache_dir`"""
+    env = dict(os.environ, PYANNOTE_VOXCELEB_CACHE=cache_dir)
+    subprocess.run(
+        [sys.executable, "-m", "VoxCeleb"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+
+
+def environment():
+    """Describe benchmark environment"""
+    import numpy
+    import VoxCeleb
+
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "version": VoxCeleb.__version__,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def summary(result):
+    """One-line human-readable summary of a measurement"""
+    name = f"{result['protocol']}.{result['iterator']} ({result['cache']})"
+    if result["status"] != "ok":
+        return f"{name:40s} {result['error']}"
+    line = (
+        f"{name:40s} {result['num_items']:8d} items  "
+        f"first {1000 * result['first_item']:8.1f}ms  "
+        f"{result['items_per_second']:10.0f} items/s  "
+        f"RSS +{result['rss_increase'] / 2**20:7.1f}MB"
+    )
+    if "tracemalloc_peak" in result:
+        line += f"  traced peak {result['tracemalloc_peak'] / 2**20:7.1f}MB"
+    return line
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--protocol", nargs="+", default=PROTOCOLS)
+    parser.add_argument("--iterator", nargs="+", default=ITERATORS)
+    parser.add_argument("--cache", nargs="+", default=CACHES, choices=CACHES)
+    parser.add_argument("--no-tracemalloc", action="store_true")
+    parser.add_argument("--run", nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run(*args.run, trace=args.trace)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+
+        warm = os.path.join(root, "warm")
+        if "warm" in args.cache:
+            compile_tables(warm)
+
+        for protocol in args.protocol:
+            for iterator in args.iterator:
+                for cache in args.cache:
+
+                    if cache == "cold":
+                        cache_dir = tempfile.mkdtemp(dir=root)
+                    else:
+                        cache_dir = warm
+                    result = spawn(protocol, iterator, cache_dir)
+                    if result["status"] == "unavailable":
+                        break
+                    result["cache"] = cache
+
+                    if result["status"] == "ok" and not args.no_tracemalloc:
+                        if cache == "cold":
+                            cache_dir = tempfile.mkdtemp(dir=root)
+                        traced = spawn(protocol, iterator, cache_dir, trace=True)
+                        result["tracemalloc_peak"] = traced["tracemalloc_peak"]
+                        result["tracemalloc_current"] = traced["tracemalloc_current"]
+
+                    results.append(result)
+                    print(summary(result), file=sys.stderr)
+
+    output = json.dumps({"environment": environment(), "results": results}, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
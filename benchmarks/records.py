@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021 CNRS
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# AUTHORS
+# Hervé BREDIN - http://herve.niderb.fr
+
+"""Benchmark memory footprint of files and trials
+
+For each protocol, compare files (and trials) yielded as `ProtocolFile`
+dictionaries (`protocol.train()`, `protocol.test_trial()`) with the same
+files yielded as lightweight records (`protocol.train_records()`,
+`protocol.test_trial_records()`), and measure:
+
+- bytes per item, when all items are kept in memory;
+- bytes per item, once their lazy values ("annotation" for files,
+  "try_with" for trial files) have been accessed;
+- items per second.
+
+Allocations are measured with tracemalloc, after tables have been loaded,
+so that only the memory used by the items themselves is accounted for.
+
+Usage: python benchmarks/records.py [--output results.json]
+                                    [--protocol NAME ...]
+                                    [--limit NUM_ITEMS]
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from protocols import environment  # noqa: E402
+
+PROTOCOLS = ["VoxCeleb1", "VoxCeleb1_X"]
+
+# (kind, iterator, record iterator, lazy value)
+ITERATORS = [
+    ("files", "train", "train_records", "annotation"),
+    ("trials", "test_trial", "test_trial_records", "try_with"),
+]
+
+
+def touch(kind, item, key):
+    """Access lazy value of item"""
+    if kind == "files":
+        item[key]
+    else:
+        item["file1"][key]
+        item["file2"][key]
+
+
+def measure(make_items, kind, key, limit):
+    """Measure memory footprint of items
+
+    Returns
+    -------
+    result : dict
+        Measurements.
+    """
+
+    # time iteration separately, as tracemalloc slows it down
+    start = time.perf_counter()
+    num_items = sum(1 for _ in itertools.islice(make_items(), limit))
+    seconds = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    items = list(itertools.islice(make_items(), limit))
+    gc.collect()
+    fresh, _ = tracemalloc.get_traced_memory()
+    for item in items:
+        touch(kind, item, key)
+    gc.collect()
+    touched, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "num_items": num_items,
+        "items_per_second": num_items / seconds,
+        "bytes_per_item": (fresh - before) / num_items,
+        f"bytes_per_item_with_{key}": (touched - before) / num_items,
+    }
+
+
+def run(protocol_name, limit=None):
+    """Measure both representations of files and trials of a protocol"""
+
+    import VoxCeleb
+
+    protocol = getattr(VoxCeleb, protocol_name)()
+
+    results = []
+    for kind, iterator, records, key in ITERATORS:
+        for representation, method in [("dict", iterator), ("record", records)]:
+
+            make_items = getattr(protocol, method)
+            try:
+                # load tables before measuring memory
+                next(iter(make_items()))
+            except NotImplementedError:
+                break
+
+            result = {
+                "protocol": protocol_name,
+                "kind": kind,
+                "iterator": method,
+                "representation": representation,
+            }
+            result.update(measure(make_items, kind, key, limit))
+            results.append(result)
+    return results
+
+
+def summary(result):
+    """One-line human-readable summary of a measurement"""
+    name = f"{result['protocol']}.{result['iterator']}"
+    lazy = [key for key in result if key.startswith("bytes_per_item_with_")][0]
+    return (
+        f"{name:40s} {result['num_items']:8d} items  "
+        f"{result['bytes_per_item']:8.0f} B/item  "
+        f"{result[lazy]:8.0f} B/item ({lazy[len('bytes_per_item_with_'):]})  "
+        f"{result['items_per_second']:10.0f} items/s"
+    )
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--protocol", nargs="+", default=PROTOCOLS)
+    parser.add_argument("--limit", type=int, help="only keep that many items")
+    args = parser.parse_args()
+
+    results = []
+    for protocol in args.protocol:
+        for result in run(protocol, limit=args.limit):
+            results.append(result)
+            print(summary(result), file=sys.stderr)
+
+    output = json.dumps({"environment": environment(), "results": results}, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -43,7 +43,7 @@ setup(
     install_requires=[
         "pyannote.core >= 4.1",
         "pyannote.database >= 4.0.1",
-        "pandas >= 0.20.1",
+        "numpy",
     ],
     classifiers=[
         "Development Status :: 4 - Beta",
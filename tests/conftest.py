@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(autouse=True, scope="session")
+def cache_dir(tmp_path_factory):
+    """Compile tables into a temporary cache directory"""
+    mp = pytest.MonkeyPatch()
+    mp.setenv("PYANNOTE_VOXCELEB_CACHE", str(tmp_path_factory.mktemp("cache")))
+    yield
+    mp.undo()
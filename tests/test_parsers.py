@@ -0,0 +1,80 @@
+import gzip
+
+import numpy as np
+import pytest
+
+from VoxCeleb import parsers
+from VoxCeleb.tables import DATA_DIR
+
+
+def read_lines(name):
+    with gzip.open(DATA_DIR / name, "rt", encoding="utf-8-sig") as f:
+        return [line.split() for line in f if line.strip()]
+
+
+@pytest.fixture(params=[None, 1000], ids=["default", "small_chunks"])
+def chunk_size(request, monkeypatch):
+    # tokens spanning chunks boundaries are the trickiest to parse
+    if request.param is not None:
+        iter_chunks = parsers.iter_chunks
+        monkeypatch.setattr(
+            parsers, "iter_chunks", lambda path: iter_chunks(path, request.param)
+        )
+    return request.param
+
+
+@pytest.mark.parametrize("name", ["vox1_tst", "vox2_tst"])
+def test_read_durations(name, chunk_size):
+    lines = read_lines(f"{name}_duration.txt.gz")
+    uri_offsets, uri_data, duration = parsers.read_durations(
+        DATA_DIR / f"{name}_duration.txt.gz"
+    )
+    uris = uri_data[:-1].tobytes().decode("utf-8").split("\n")
+    assert uris == [uri for uri, _ in lines]
+    assert duration.tolist() == [float(d) for _, d in lines]
+    assert uri_offsets[-1] == len(uri_data)
+
+
+def test_read_trials(chunk_size):
+    lines = read_lines("verif_original.txt.gz")
+    reference, file1, file2 = parsers.read_trials(DATA_DIR / "verif_original.txt.gz")
+    assert reference.tolist() == [int(r) for r, _, _ in lines]
+    assert file1.tolist() == [f.encode("utf-8") for _, f, _ in lines]
+    assert file2.tolist() == [f.encode("utf-8") for _, _, f in lines]
+    assert lines[0] == [
+        "1",
+        "id10270/x6uYqmx31kE/00001.wav",
+        "id10270/8jEAjG6SegY/00008.wav",
+    ]
+
+
+def test_read_identities(chunk_size):
+    identities = parsers.read_identities(DATA_DIR / "vox1_identities.txt.gz")
+    assert identities == dict(read_lines("vox1_identities.txt.gz"))
+    assert identities["id10001"] == "A.J._Buckley"
+
+
+def test_read_csv():
+    columns = parsers.read_csv(DATA_DIR / "vox2_meta.csv.gz")
+    assert list(columns) == ["VoxCeleb2 ID", "VGGFace2 ID", "Gender", "Set"]
+    row = [column[0] for column in columns.values()]
+    assert row == ["id00012", "n000012", "m", "dev"]
+
+
+@pytest.mark.parametrize(
+    "parse, text",
+    [(parsers.read_durations, "a/b/1 1.0\na/b/2\n"), (parsers.read_trials, "1 a\n")],
+)
+def test_invalid_number_of_fields(tmp_path, parse, text):
+    path = tmp_path / "table.txt"
+    path.write_text(text)
+    with pytest.raises(ValueError, match="expected to contain"):
+        parse(path)
+
+
+def test_empty_table(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_text("")
+    uri_offsets, uri_data, duration = parsers.read_durations(path)
+    assert uri_offsets.tolist() == [0] and len(uri_data) == len(duration) == 0
+    assert duration.dtype == np.float64
@@ -0,0 +1,65 @@
+import pytest
+
+from VoxCeleb import Debug, VoxCeleb1, VoxCeleb1_X
+
+
+def test_missing_trials_raise_attribute_error():
+    # same contract as pyannote.database for protocols without such trials
+    with pytest.raises(AttributeError, match="development_trial_iter"):
+        next(VoxCeleb1().development_trial())
+
+
+def test_test_trial():
+    trial = next(VoxCeleb1().test_trial())
+    assert set(trial) == {"reference", "file1", "file2"}
+    assert trial["file1"]["try_with"].duration() > 0
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"stride": 0}, {"fraction": 0.0}, {"fraction": 2.0}, {"num_trials": -1}]
+)
+def test_debug_invalid_parameters(kwargs):
+    with pytest.raises(ValueError):
+        Debug(**kwargs)
+
+
+def test_debug_fraction():
+    protocol = Debug(fraction=1.0)
+    assert len(protocol.train_table()) == len(VoxCeleb1_X().train_table())
+
+
+def test_preprocessors_transform_default_annotation():
+    def upper(current_file):
+        speaker = current_file["speaker"]
+        return current_file["annotation"].rename_labels({speaker: speaker.upper()})
+
+    protocol = VoxCeleb1(preprocessors={"annotation": upper})
+    assert next(protocol.test())["annotation"].labels() == ["ID10277"]
+    assert next(protocol.test_records())["annotation"].labels() == ["ID10277"]
+
+
+def test_subclass_overriding_iter():
+    # documented pyannote.database pattern (no rank nor world_size)
+    class Custom(VoxCeleb1):
+        def test_iter(self):
+            yield {"uri": "spk/video/00001", "database": "VoxCeleb"}
+
+    assert [file["uri"] for file in Custom().test()] == ["spk/video/00001"]
+
+
+def test_invalid_shard_without_sharding():
+    with pytest.raises(ValueError, match="Invalid shard"):
+        next(VoxCeleb1().test(rank=5, world_size=1))
+
+
+def test_durations_are_not_rounded():
+    import gzip
+
+    from VoxCeleb.tables import DATA_DIR
+
+    with gzip.open(DATA_DIR / "vox1_tst_duration.txt.gz", "rt") as f:
+        uri, duration = f.readline().split()
+    file = next(VoxCeleb1().test())
+    assert file["uri"] == uri
+    assert file["duration"] == float(duration)
+    assert file["annotated"].extent().end == float(duration)
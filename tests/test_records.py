@@ -0,0 +1,50 @@
+import pickle
+from itertools import islice
+
+import pytest
+from pyannote.database.protocol.protocol import ProtocolFile
+
+from VoxCeleb import VoxCeleb1
+
+
+@pytest.mark.parametrize("subset", ["train", "test"])
+def test_file_records(subset):
+    protocol = VoxCeleb1()
+    files = islice(getattr(protocol, subset)(), 50)
+    records = islice(getattr(protocol, f"{subset}_records")(), 50)
+    for file, record in zip(files, records):
+        assert dict(record) == dict(file)
+
+
+def test_trial_records():
+    protocol = VoxCeleb1()
+    trials = islice(protocol.test_trial(), 50)
+    records = islice(protocol.test_trial_records(), 50)
+    for trial, record in zip(trials, records):
+        assert record["reference"] == trial["reference"]
+        assert dict(record["file1"]) == dict(trial["file1"])
+        assert dict(record["file2"]) == dict(trial["file2"])
+
+
+def test_pickled_file_records():
+    records = islice(VoxCeleb1().test_records(), 10)
+    for r, record in enumerate(records):
+        # records are pickled as protocol files, before and after keys are
+        # computed, set, or deleted by the caller
+        if r == 1:
+            record["annotation"]
+        elif r == 2:
+            record["custom"] = r
+        elif r == 3:
+            del record["speaker"]
+        file = pickle.loads(pickle.dumps(record))
+        assert isinstance(file, ProtocolFile)
+        assert dict(file) == dict(record)
+
+
+def test_pickled_trial_records():
+    for record in islice(VoxCeleb1().test_trial_records(), 10):
+        trial = pickle.loads(pickle.dumps(record))
+        assert trial["reference"] == record["reference"]
+        assert dict(trial["file1"]) == dict(record["file1"])
+        assert dict(trial["file2"]) == dict(record["file2"])
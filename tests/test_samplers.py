@@ -0,0 +1,98 @@
+from itertools import islice
+
+import numpy as np
+import pytest
+
+from VoxCeleb import VoxCeleb1, samplers
+from VoxCeleb.samplers import ChunkSampler, SpeakerBatchSampler
+
+
+def test_speaker_batches():
+    protocol = VoxCeleb1()
+    index = protocol.train_speaker_index()
+    sampler = protocol.train_speaker_batches(num_speakers=8, num_files=4)
+    for batch in islice(sampler, 20):
+        labels = index.labels[batch].reshape(8, 4)
+        # batches are grouped by (distinct) speakers...
+        assert np.all(labels == labels[:, :1])
+        assert len(set(labels[:, 0].tolist())) == 8
+        # ... with distinct files per speaker
+        assert all(len(set(files)) == 4 for files in batch.reshape(8, 4).tolist())
+
+
+def test_speaker_batches_with_few_files():
+    # speakers with less than `num_files` files are drawn with replacement
+    index = VoxCeleb1().test_table().take(np.arange(30)).speaker_index()
+    sampler = SpeakerBatchSampler(index, num_speakers=len(index), num_files=50)
+    batch = sampler.batch(0).reshape(len(index), 50)
+    assert np.all(index.labels[batch] == np.arange(len(index))[:, None])
+
+
+@pytest.mark.parametrize("world_size, num_workers", [(1, 1), (2, 1), (2, 3)])
+def test_batches_are_split(monkeypatch, world_size, num_workers):
+    index = VoxCeleb1().train_speaker_index()
+
+    def batches(rank, worker_id):
+        # as if drawn by `worker_id`-th of `num_workers` data loader workers
+        def get_worker_info():
+            return worker_id, num_workers
+
+        monkeypatch.setattr(samplers, "get_worker_info", get_worker_info)
+        sampler = SpeakerBatchSampler(
+            index, 4, 2, seed=1, rank=rank, world_size=world_size, start=3
+        )
+        return [batch.tolist() for batch in islice(sampler, 10)]
+
+    # (rank, worker) pairs draw the same batches as a single process would...
+    split = [
+        batches(rank, worker_id)
+        for rank in range(world_size)
+        for worker_id in range(num_workers)
+    ]
+    drawn = [batch for batches_ in zip(*split) for batch in batches_]
+    single = SpeakerBatchSampler(index, 4, 2, seed=1, start=3)
+    assert drawn == [single.batch(b).tolist() for b in range(3, 3 + len(drawn))]
+
+    # ... and never draw the same batch twice
+    assert len({tuple(batch) for batch in drawn}) == len(drawn)
+
+
+def test_chunk_batches():
+    protocol = VoxCeleb1()
+    durations = protocol.train_table().duration
+    sampler = protocol.train_chunk_batches(duration=2.0, batch_size=64)
+    for indices, offsets in islice(sampler, 20):
+        # chunks are within files
+        assert np.all(offsets >= 0.0)
+        assert np.all(offsets + 2.0 <= durations[indices])
+
+
+@pytest.mark.parametrize("policy", ["exclude", "pad"])
+def test_chunk_batches_with_short_files(policy):
+    durations = np.array([1.0, 3.0, 0.5, 0.0, 10.0])
+    sampler = ChunkSampler(durations, 2.0, batch_size=1000, policy=policy)
+    indices, offsets = sampler.batch(0)
+    short = durations[indices] < 2.0
+    if policy == "exclude":
+        assert set(indices.tolist()) == {1, 4}
+    else:
+        # short (but not empty) files are drawn, with chunks starting at 0
+        assert set(indices.tolist()) == {0, 1, 2, 4}
+        assert np.all(offsets[short] == 0.0)
+    assert np.all(offsets[~short] + 2.0 <= durations[indices][~short])
+
+
+def test_no_file_long_enough():
+    with pytest.raises(ValueError, match="long enough"):
+        ChunkSampler([1.0, 0.5], 2.0, batch_size=8)
+
+
+def test_chunk_batches_are_split():
+    durations = VoxCeleb1().train_table().duration
+    single = ChunkSampler(durations, 2.0, 16, seed=2)
+    for rank in range(2):
+        sampler = ChunkSampler(durations, 2.0, 16, seed=2, rank=rank, world_size=2)
+        for b, (indices, offsets) in enumerate(islice(sampler, 5)):
+            expected_indices, expected_offsets = single.batch(2 * b + rank)
+            assert np.array_equal(indices, expected_indices)
+            assert np.array_equal(offsets, expected_offsets)
@@ -0,0 +1,65 @@
+import struct
+import sys
+from pathlib import Path
+
+import pytest
+
+from VoxCeleb import scan
+
+
+def write_wav(path, sample_rate=16000, block_align=2, num_samples=16000):
+    data = b"\x00" * (num_samples * block_align)
+    fmt = struct.pack(
+        "<HHIIHH", 1, 1, sample_rate, sample_rate * block_align, block_align, 16
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"RIFF" + struct.pack("<I", 36 + len(data)) + b"WAVE")
+        f.write(b"fmt " + struct.pack("<I", len(fmt)) + fmt)
+        f.write(b"data" + struct.pack("<I", len(data)) + data)
+
+
+def test_wav_duration(tmp_path):
+    path = tmp_path / "a.wav"
+    write_wav(path, num_samples=8000)
+    assert scan.wav_duration(path) == 0.5
+
+
+@pytest.mark.parametrize("fmt", [{"sample_rate": 0}, {"block_align": 0}])
+def test_invalid_wav_fmt(tmp_path, fmt):
+    path = tmp_path / "a.wav"
+    write_wav(path, **fmt)
+    with pytest.raises(ValueError, match="Invalid 'fmt ' chunk"):
+        scan.wav_duration(path)
+
+    # invalid files are reported instead of aborting the whole scan
+    durations, errors = scan.scan({"spk/vid/00001": str(path)})
+    assert not durations and list(errors) == ["spk/vid/00001"]
+
+
+def test_output_dir_is_required(tmp_path, monkeypatch, capsys):
+    write_wav(tmp_path / "spk" / "vid" / "00001.wav", num_samples=0)
+    monkeypatch.delenv("PYANNOTE_VOXCELEB_DATA", raising=False)
+    argv = ["scan", "vox1_tst", str(tmp_path / "{uri}.wav")]
+    monkeypatch.setattr(sys, "argv", argv)
+    with pytest.raises(SystemExit):
+        scan.main()
+    assert "--output-dir is required" in capsys.readouterr().err
+
+
+def test_output_dir_defaults_to_data_dir(tmp_path, monkeypatch):
+    write_wav(tmp_path / "spk" / "vid" / "00001.wav", num_samples=8000)
+    monkeypatch.setenv("PYANNOTE_VOXCELEB_DATA", str(tmp_path / "tables"))
+    argv = ["scan", "vox1_tst", str(tmp_path / "{uri}.wav")]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert scan.main() == 0
+    assert (tmp_path / "tables" / "vox1_tst_duration.txt.gz").is_file()
+
+
+# AAC files encoded by ffmpeg 7.0.2 (16kHz mono, 2.5s of silence), with
+# their "moov" box at the end (default) or at the beginning (faststart)
+@pytest.mark.parametrize("name", ["silence.m4a", "silence_faststart.m4a"])
+def test_m4a_duration(name):
+    path = Path(__file__).parent / "data" / name
+    # media duration would include 1024 priming samples (+64ms)
+    assert scan.mp4_duration(path) == pytest.approx(2.5)
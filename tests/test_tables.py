@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+from VoxCeleb import VoxCeleb1
+from VoxCeleb.tables import FileTable
+
+
+def test_file_table_statistics():
+    table = VoxCeleb1().test_table()
+    statistics = table.statistics()
+    assert statistics.num_files == len(table)
+    assert statistics.num_speakers == len(set(table.speaker.tolist()))
+    assert statistics.total_duration == pytest.approx(np.sum(table.duration))
+    assert len(statistics.speaker_duration) == statistics.num_speakers
+
+
+def test_trial_table_statistics():
+    trials = VoxCeleb1().test_trial_table()
+    statistics = trials.statistics()
+    assert statistics.num_files == len(trials.files)
+    assert statistics.num_speakers == 40
+    assert statistics.total_duration == pytest.approx(np.sum(trials.files.duration))
+
+
+@pytest.mark.parametrize(
+    "uris", [["a/b/c"], ["spk/vid"], ["spk/vid", "a/b/00001"], ["a/b/00001", "spk/vid"]]
+)
+def test_uris_without_codes(uris):
+    table = FileTable.from_uris(uris, np.ones(len(uris)))
+    assert table.codes() is None
+    assert table.speaker.tolist() == [uri.split("/")[0] for uri in uris]
+    with pytest.raises(ValueError, match="video"):
+        table.video
+
+    # tables without codes can still be compiled, concatenated, and iterated
+    table = FileTable.from_arrays(table.to_arrays())
+    assert table.uris == uris
+    union = FileTable.concatenate([table, FileTable.from_uris(["x/y/1"], [1.0])])
+    assert union.codes() is None
+    assert [speaker for _, _, speaker in union.iter_rows()] == union.speaker.tolist()
+
+
+def test_uri_codes():
+    table = FileTable.from_uris(["b/v/00002", "a/w/00001"], np.ones(2))
+    codes = table.codes()
+    assert codes.speakers.tolist() == ["a", "b"]
+    assert table.video.tolist() == ["v", "w"]
+    assert table.utterance.tolist() == [2, 1]
+
+
+def test_uris_from_codes():
+    uris = ["id2/vid/00002", "é/w/00010", "id1/video/00001"]
+    arrays = FileTable.from_uris(uris, np.ones(3)).to_arrays()
+    assert "uri_data" not in arrays and int(arrays["utterance_width"]) == 5
+
+    # uris are rebuilt from codes, whatever the way they are accessed
+    table = FileTable.from_arrays(arrays)
+    assert table.uris == uris
+    assert [table.get_uri(i) for i in range(3)] == uris
+    assert [uri for uri, _, _ in table.iter_rows(chunk_size=2)] == uris
+    assert FileTable.from_arrays(arrays).uri.tolist() == uris
+
+    subset = table.take([2, 0])
+    assert subset.uris == [uris[2], uris[0]]
+    assert subset.speaker_index().speakers.tolist() == ["id1", "id2"]
+    union = FileTable.concatenate([table, FileTable.from_uris(["a/b/00003"], [1.0])])
+    assert "uri_data" not in union.to_arrays()
+    assert union.uris == uris + ["a/b/00003"]
+
+
+def test_uris_not_rebuilt_from_codes():
+    # utterances with different number of digits
+    uris = ["spk/vid/1", "spk/vid/00002"]
+    arrays = FileTable.from_uris(uris, np.ones(2)).to_arrays()
+    assert "utterance_width" not in arrays
+    table = FileTable.from_arrays(arrays)
+    assert table.codes() is not None and table.uris == uris
+
+    union = FileTable.concatenate([table, FileTable.from_uris(["a/b/003"], [1.0])])
+    assert "uri_data" in union.to_arrays()
+    assert union.uris == uris + ["a/b/003"]
+    assert union.utterance.tolist() == [1, 2, 3]
+
+
+@pytest.mark.parametrize("world_size", [1, 2, 3, 8])
+def test_file_table_shards(world_size):
+    table = VoxCeleb1().train_table()
+    shards = [table.shard(rank, world_size) for rank in range(world_size)]
+
+    # shards cover every file exactly once...
+    uris = [uri for shard in shards for uri in shard.uris]
+    assert len(uris) == len(table) and set(uris) == set(table.uris)
+
+    # ... and are balanced by duration
+    durations = [np.sum(shard.duration, dtype=np.float64) for shard in shards]
+    assert max(durations) - min(durations) <= np.max(table.duration)
+
+
+@pytest.mark.parametrize("world_size", [1, 2, 3])
+def test_trial_table_shards(world_size):
+    trials = VoxCeleb1().test_trial_table()
+    shards = [trials.shard(rank, world_size) for rank in range(world_size)]
+
+    def rows(trials):
+        uris = trials.files.uris
+        return [
+            (uris[i1], uris[i2], r)
+            for (i1, i2), r in zip(trials.pairs.tolist(), trials.reference.tolist())
+        ]
+
+    shard_rows = [row for shard in shards for row in rows(shard)]
+    assert sorted(shard_rows) == sorted(rows(trials))
+
+    # trials of an enrolment file all end up in the same shard
+    enrolments = [{row[0] for row in rows(shard)} for shard in shards]
+    assert sum(len(e) for e in enrolments) == len(set.union(*enrolments))
+
+
+@pytest.mark.parametrize("rank, world_size", [(5, 1), (1, 1), (-1, 2), (0, 0)])
+def test_invalid_shard(rank, world_size):
+    with pytest.raises(ValueError, match="Invalid shard"):
+        VoxCeleb1().test_table().shard(rank, world_size)
+    with pytest.raises(ValueError, match="Invalid shard"):
+        VoxCeleb1().test_trial_table().shard(rank, world_size)
+
+
+def test_take_does_not_decode_uris():
+    table = FileTable.from_uris(["a/b/00001", "c/d/00002", "é/f/00003"], np.ones(3))
+    subset = table.take([2, 0, 2])
+    assert subset.uris == ["é/f/00003", "a/b/00001", "é/f/00003"]
+    assert table._uris is None
+
+
+def test_compile_tables(capsys):
+    from VoxCeleb.tables import compile_tables
+
+    compiled = compile_tables()
+    assert compiled and all(path.is_dir() for path in compiled)
+    assert capsys.readouterr().out == ""